@@ -1,51 +1,119 @@
-from flask import Flask, render_template, jsonify
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from flask import Flask, Response, g, render_template, jsonify, request
 from datetime import datetime, timedelta
 import pandas as pd
-import yfinance as yf
-from entry_score import calculate_entry_score
+from entry_score import (calculate_scores_range, score_dates, score_row_to_result, warm_up,
+                         find_next_high_risk_day, BREAKDOWN_KEYS)
 from fed_meetings import get_all_fed_dates
+from calendars import get_calendars
+from economic_date import check_economic_data_nearby
+from earnings import earnings_catalysts, DEFAULT_WEIGHTS
+from below18 import get_vix_store
+from vix_analytics import get_vix_analytics, describe_context
+from snapshot import SnapshotCache, data_status, data_version, describe_data_status
+from scheduler import RefreshScheduler
+import score_table
+import http_cache
+import profiling
+import metrics
+from metrics import HTTP_SECONDS, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_time(response):
+    # Streamed bodies are timed up to the first byte, not the whole transfer
+    start = g.pop('request_start', None)
+    if start is not None:
+        HTTP_SECONDS.observe(time.perf_counter() - start,
+                             request.endpoint or 'unknown', str(response.status_code))
+    return response
+
+
+app.after_request(http_cache.compress)
+# Per-request profiles, only when VOLATILITY_PROFILING=1
+profiling.install(app)
+
+
+def render(template, **context):
+    """render_template, timed as the 'render' stage."""
+    with STAGE_SECONDS.time('render'):
+        return render_template(template, **context)
+
+def describe_earnings(date, limit=3):
+    """'AAPL, MSFT +4 more (18% of market cap)' for the tickers reporting near date."""
+    try:
+        row = earnings_catalysts([date]).iloc[0]
+    except Exception:
+        return "Major Tech Earnings"
+    tickers = row['earnings_tickers']
+    text = ', '.join(tickers[:limit])
+    if len(tickers) > limit:
+        text += f" +{len(tickers) - limit} more"
+    if DEFAULT_WEIGHTS:
+        text += f" ({row['earnings_weight']:.0%} of market cap)"
+    return text
+
+
+def estimated_catalysts(date, breakdown):
+    """
+    Breakdown keys whose event date is a rule-based estimate rather than
+    a published one (see calendars.json).
+    """
+    calendars = get_calendars()
+    estimated = []
+    if breakdown['fed_meeting'] and calendars.estimated('fed', date):
+        estimated.append('fed_meeting')
+    if breakdown['economic_data']:
+        releases = check_economic_data_nearby(date.strftime('%Y-%m-%d'))['releases']
+        if releases and all(r['estimated'] for r in releases):
+            estimated.append('economic_data')
+    return estimated
+
+
 def get_volatility_data():
     """Get today's volatility score and info."""
     today = datetime.now()
+    status = data_status()
     
-    # Get VIX
-    vix = yf.download('^VIX', period='5d', progress=False)
-    if isinstance(vix.columns, pd.MultiIndex):
-        vix_close = vix['Close']['^VIX']
-    else:
-        vix_close = vix['Close']
-    current_vix = float(vix_close.iloc[-1])
+    # Get VIX and its precomputed features
+    try:
+        vix = get_vix_analytics().latest()
+    except Exception:
+        vix = None
+    current_vix = vix['close'] if vix else None
     
     # Get score
-    import sys
-    from io import StringIO
-    old_stdout = sys.stdout
-    sys.stdout = StringIO()
-    
     try:
-        score_result = calculate_entry_score(today.strftime('%Y-%m-%d'))
-        sys.stdout = old_stdout
-    except:
-        sys.stdout = old_stdout
-        score_result = {
-            'score': 0,
-            'conviction': 'NONE',
-            'breakdown': {
-                'fed_meeting': False,
-                'vix_low': False,
-                'earnings': False,
-                'economic_data': False
-            }
-        }
+        scores = score_dates([today])
+        score_result = score_row_to_result(scores.index[0], scores.iloc[0])
+    except Exception:
+        # Don't pass a data outage off as a calm day
+        score_result = None
     
-    score = score_result['score']
-    breakdown = score_result['breakdown']
+    score = score_result['score'] if score_result else None
+    breakdown = score_result['breakdown'] if score_result else dict.fromkeys(BREAKDOWN_KEYS, False)
     
     # Determine risk level
-    if score >= 7:
+    if score is None:
+        risk_level = "UNKNOWN"
+        risk_color = "#6c757d"
+        risk_emoji = "❔"
+        description = "Market data is unavailable - today's score could not be computed"
+    elif score >= 7:
         risk_level = "HIGH"
         risk_color = "#dc3545"
         risk_emoji = "⚠️"
@@ -62,51 +130,37 @@ def get_volatility_data():
         description = "Few catalysts - relatively calm market expected"
     
     # VIX status
-    if current_vix < 15:
-        vix_status = "Very Low"
-    elif current_vix < 20:
-        vix_status = "Low to Moderate"
-    elif current_vix < 30:
-        vix_status = "Elevated"
-    else:
-        vix_status = "High"
+    vix_status = vix['regime'] if vix else "Unavailable"
     
     # Catalysts
+    estimated = estimated_catalysts(today, breakdown) if score is not None else []
     catalysts = []
     if breakdown['fed_meeting']:
-        catalysts.append("🏛️ Federal Reserve Meeting")
+        catalysts.append("🏛️ Federal Reserve Meeting" + (" (estimated date)" if 'fed_meeting' in estimated else ""))
     if breakdown['earnings']:
-        catalysts.append("📊 Major Tech Earnings")
+        catalysts.append(f"📊 Earnings: {describe_earnings(today)}")
     if breakdown['economic_data']:
-        catalysts.append("📈 Economic Data Release")
+        catalysts.append("📈 Economic Data Release" + (" (estimated date)" if 'economic_data' in estimated else ""))
     if breakdown['vix_low']:
         catalysts.append("💤 VIX Below 18")
     
-    if not catalysts:
+    if score is None:
+        catalysts = ["❔ Catalysts unavailable"]
+    elif not catalysts:
         catalysts = ["✅ No major catalysts today"]
     
     # Next high-risk day
     next_high_risk = None
-    for i in range(1, 31):
-        check_date = today + timedelta(days=i)
-        if check_date.weekday() >= 5:
-            continue
-        
-        old_stdout = sys.stdout
-        sys.stdout = StringIO()
-        try:
-            future_score = calculate_entry_score(check_date.strftime('%Y-%m-%d'))
-            sys.stdout = old_stdout
-            
-            if future_score['score'] >= 7:
-                next_high_risk = {
-                    'date': check_date.strftime('%B %d, %Y'),
-                    'days_away': i,
-                    'score': future_score['score']
-                }
-                break
-        except:
-            sys.stdout = old_stdout
+    try:
+        found = find_next_high_risk_day(today, threshold=7, horizon_days=30)
+    except Exception:
+        found = None
+    if found:
+        next_high_risk = {
+            'date': pd.to_datetime(found['date']).strftime('%B %d, %Y'),
+            'days_away': found['days_away'],
+            'score': found['score']
+        }
     
     if not next_high_risk:
         # Check next Fed meeting
@@ -120,7 +174,8 @@ def get_volatility_data():
                         'date': fed_dt.strftime('%B %d, %Y'),
                         'days_away': days_until,
                         'score': 'Fed Meeting',
-                        'type': 'fed'
+                        'type': 'fed',
+                        'estimated': get_calendars().estimated('fed', fed_date)
                     }
                 break
     
@@ -131,10 +186,18 @@ def get_volatility_data():
         'risk_color': risk_color,
         'risk_emoji': risk_emoji,
         'description': description,
-        'vix': f"{current_vix:.2f}",
+        'vix': f"{current_vix:.2f}" if current_vix is not None else "UNAVAILABLE",
         'vix_status': vix_status,
+        'vix_context': describe_context(vix) if vix else "Unavailable",
         'catalysts': catalysts,
-        'next_high_risk': next_high_risk
+        'estimated_catalysts': estimated,
+        'next_high_risk': next_high_risk,
+        'stale': status['stale'],
+        'data_status': {
+            'vix': {'as_of': status['vix']['as_of'], 'stale': status['vix']['stale']},
+            'earnings': {'stale': status['earnings']['stale'], 'tickers': status['earnings']['tickers']}
+        },
+        'warnings': describe_data_status(status)
     }
 
 
@@ -143,76 +206,54 @@ def get_weekly_scores():
     today = datetime.now()
     weekly = []
     
-    for i in range(7):
-        check_date = today + timedelta(days=i)
-        
+    try:
+        scores = calculate_scores_range(today, today + timedelta(days=6))
+    except Exception:
+        return weekly
+    
+    for check_date, row in scores.iterrows():
         if check_date.weekday() >= 5:
             continue
         
-        import sys
-        from io import StringIO
-        old_stdout = sys.stdout
-        sys.stdout = StringIO()
+        score = int(row['score'])
         
-        try:
-            score_result = calculate_entry_score(check_date.strftime('%Y-%m-%d'))
-            sys.stdout = old_stdout
-            
-            score = score_result['score']
-            
-            if score >= 7:
-                color = "#dc3545"
-                level = "HIGH"
-            elif score >= 4:
-                color = "#ffc107"
-                level = "MODERATE"
-            else:
-                color = "#28a745"
-                level = "LOW"
-            
-            weekly.append({
-                'date': check_date.strftime('%a, %b %d'),
-                'score': score,
-                'color': color,
-                'level': level
-            })
-        except:
-            sys.stdout = old_stdout
+        if score >= 7:
+            color = "#dc3545"
+            level = "HIGH"
+        elif score >= 4:
+            color = "#ffc107"
+            level = "MODERATE"
+        else:
+            color = "#28a745"
+            level = "LOW"
+        
+        weekly.append({
+            'date': check_date.strftime('%a, %b %d'),
+            'score': score,
+            'color': color,
+            'level': level
+        })
     
     return weekly
 
 
-@app.route('/')
-def index():
-    """Main dashboard page."""
-    data = get_volatility_data()
-    return render_template('index.html', data=data)
-
-
-@app.route('/weekly')
-def weekly():
-    """Weekly view page."""
-    data = get_volatility_data()
-    weekly_data = get_weekly_scores()
-    return render_template('weekly.html', data=data, weekly=weekly_data)
-
-@app.route('/fed-calendar')
-def fed_calendar():
-    """Fed meetings calendar page."""
-    data = get_volatility_data()
-    
+def get_upcoming_feds():
+    """Get upcoming Fed meetings with their scores."""
     today = datetime.now()
     fed_dates = get_all_fed_dates()
     
     upcoming_feds = []
     
-    for fed_date in sorted(fed_dates):
+    # Only show future meetings
+    future_feds = [d for d in sorted(fed_dates) if pd.to_datetime(d) >= today]
+    try:
+        scores = score_dates(future_feds)
+    except Exception:
+        future_feds = []
+    
+    for fed_date in future_feds:
         fed_dt = pd.to_datetime(fed_date)
         
-        # Only show future meetings
-        if fed_dt < today:
-            continue
-        
         # Calculate entry date
         entry_date = fed_dt - timedelta(days=3)
         while entry_date.weekday() >= 5:
@@ -222,54 +263,334 @@ def fed_calendar():
         days_until_entry = (entry_date - today).days
         
         # Get score
-        import sys
-        from io import StringIO
-        old_stdout = sys.stdout
-        sys.stdout = StringIO()
+        score_result = score_row_to_result(fed_dt, scores.loc[fed_dt])
+        score = score_result['score']
         
+        if score >= 7:
+            color = "#dc3545"
+            level = "HIGH"
+            emoji = "🔥"
+        elif score >= 4:
+            color = "#ffc107"
+            level = "MODERATE"
+            emoji = "⚠️"
+        else:
+            color = "#28a745"
+            level = "LOW"
+            emoji = "💤"
+        
+        upcoming_feds.append({
+            'fed_date': fed_dt.strftime('%B %d, %Y'),
+            'fed_date_short': fed_dt.strftime('%b %d'),
+            'entry_date': entry_date.strftime('%B %d, %Y'),
+            'entry_date_short': entry_date.strftime('%b %d'),
+            'days_until': days_until,
+            'days_until_entry': days_until_entry,
+            'score': score,
+            'level': level,
+            'color': color,
+            'emoji': emoji,
+            'breakdown': score_result['breakdown'],
+            # 'published' or 'rule'; rule dates are estimates until the Fed posts its calendar
+            'source': get_calendars().source('fed', fed_dt.year),
+            'estimated': estimated_catalysts(fed_dt, score_result['breakdown'])
+        })
+    
+    return upcoming_feds
+
+
+def build_dashboard():
+    """Everything the pages and the API show, computed in one go."""
+    return {
+        'data': get_volatility_data(),
+        'weekly': get_weekly_scores(),
+        'feds': get_upcoming_feds()
+    }
+
+
+# One dashboard payload per trading date and data version, shared by all routes
+dashboard_cache = SnapshotCache(build_dashboard, name='dashboard')
+
+
+def refresh_dashboard(force=False):
+    """
+    Pull new market data if due, then rebuild the dashboard if anything changed.
+    
+    Each step runs even if an earlier one failed: a vendor outage at the
+    market open must still roll the dashboard over to the new trading
+    date (built from the stored data, marked stale).
+    """
+    if force:
+        vix_store = get_vix_store()
         try:
-            score_result = calculate_entry_score(fed_date)
-            sys.stdout = old_stdout
-            
-            score = score_result['score']
-            
-            if score >= 7:
-                color = "#dc3545"
-                level = "HIGH"
-                emoji = "🔥"
-            elif score >= 4:
-                color = "#ffc107"
-                level = "MODERATE"
-                emoji = "⚠️"
-            else:
-                color = "#28a745"
-                level = "LOW"
-                emoji = "💤"
-            
-            upcoming_feds.append({
-                'fed_date': fed_dt.strftime('%B %d, %Y'),
-                'fed_date_short': fed_dt.strftime('%b %d'),
-                'entry_date': entry_date.strftime('%B %d, %Y'),
-                'entry_date_short': entry_date.strftime('%b %d'),
-                'days_until': days_until,
-                'days_until_entry': days_until_entry,
-                'score': score,
-                'level': level,
-                'color': color,
-                'emoji': emoji,
-                'breakdown': score_result['breakdown']
-            })
-        except:
-            sys.stdout = old_stdout
-    
-    return render_template('fed_calendar.html', data=data, feds=upcoming_feds)
+            vix_store.update()
+        except Exception as e:
+            vix_store.mark_failed(e)
+            logger.warning("VIX update failed, serving stored history: %s", vix_store.last_error)
+    try:
+        # Only the worker holding the table lock writes; the rest just re-read it
+        score_table.get_writer().rebuild_if_changed()
+    except Exception:
+        logger.exception("Score table rebuild failed")
+    try:
+        dashboard_cache.rebuild()
+    except Exception:
+        # Retry on the next refresh instead of treating the old payload as current
+        dashboard_cache.invalidate()
+        logger.exception("Dashboard rebuild failed")
+
+
+# Precomputes the dashboard (including the 30-day look-ahead) off the request path
+scheduler = RefreshScheduler(refresh_dashboard)
+
+
+# pid of the process whose worker setup has run (forked children run their own)
+_started_pid = None
+
+
+def start_background_refresh():
+    """
+    Serve precomputed dashboards and keep them current from a background thread.
+    
+    Safe to call in every worker of a prefork server: the first one to
+    start becomes the score table writer and the others map its file.
+    """
+    score_table.get_writer().acquire()
+    score_table.enable()
+    dashboard_cache.background = True
+    scheduler.start()
+
+
+def start_worker():
+    """
+    Per-process startup: warm the data stores, then start_background_refresh().
+    Runs once per process; further calls do nothing.
+    
+    Call it in each serving process after the fork, never in a prefork
+    server's master: threads do not survive fork() and the score table
+    lock would be shared with every child. gunicorn.conf.py does this
+    from post_fork.
+    """
+    global _started_pid
+    if _started_pid == os.getpid():
+        return
+    _started_pid = os.getpid()
+    warm_up()
+    start_background_refresh()
+
+
+def create_app():
+    """
+    WSGI entry point for servers that import the app in each worker,
+    e.g. gunicorn 'app:create_app()'. Starts this worker's refresh.
+    """
+    start_worker()
+    return app
+
+
+# Pages change only when the dashboard snapshot does
+cached_page = http_cache.conditional(dashboard_cache.etag, lambda: dashboard_cache.built_at)
+
+
+@app.route('/')
+@cached_page
+def index():
+    """Main dashboard page."""
+    data = dashboard_cache.get()['data']
+    return render('index.html', data=data)
+
+
+@app.route('/weekly')
+@cached_page
+def weekly():
+    """Weekly view page."""
+    dashboard = dashboard_cache.get()
+    return render('weekly.html', data=dashboard['data'], weekly=dashboard['weekly'])
+
+@app.route('/fed-calendar')
+@cached_page
+def fed_calendar():
+    """Fed meetings calendar page."""
+    dashboard = dashboard_cache.get()
+    return render('fed_calendar.html', data=dashboard['data'], feds=dashboard['feds'])
 
 @app.route('/api/score')
+@cached_page
 def api_score():
     """API endpoint for current score (for mobile apps, etc)."""
-    data = get_volatility_data()
+    data = dashboard_cache.get()['data']
     return jsonify(data)
 
 
+# /api/scores limits and defaults
+SCORE_FIELDS = ['date', 'score', 'conviction', 'fed_meeting', 'vix_low', 'earnings', 'economic_data']
+MAX_RANGE_DAYS = 3660
+STREAM_CHUNK_DAYS = 92
+
+
+def iter_score_rows(start, end, fields):
+    """Yield one dict per day, scoring the range a chunk at a time."""
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=STREAM_CHUNK_DAYS - 1), end)
+        scores = calculate_scores_range(chunk_start, chunk_end)
+        columns = {
+            'date': scores.index.strftime('%Y-%m-%d'),
+            'score': scores['score'].tolist(),
+            'conviction': scores['conviction'].tolist(),
+        }
+        for key in BREAKDOWN_KEYS:
+            columns[key] = scores[key].tolist()
+        for values in zip(*(columns[field] for field in fields)):
+            yield dict(zip(fields, values))
+        chunk_start = chunk_end + timedelta(days=1)
+
+
+@app.route('/api/scores')
+def api_scores():
+    """
+    Scores for a date range, streamed.
+    
+    Query params:
+        start, end: 'YYYY-MM-DD' (default: today and 30 days later)
+        fields: comma-separated subset of SCORE_FIELDS (default: all)
+        format: 'ndjson' (default) or 'json'; Accept: application/json also picks JSON
+    
+    X-Data-Stale names the inputs (vix, earnings) served from an old copy
+    because the vendor is failing.
+    """
+    try:
+        start = pd.to_datetime(request.args.get('start') or datetime.now()).normalize()
+        end = pd.to_datetime(request.args.get('end') or start + timedelta(days=30)).normalize()
+    except (ValueError, TypeError):
+        return jsonify({'error': 'start and end must be dates (YYYY-MM-DD)'}), 400
+    if end < start:
+        return jsonify({'error': 'end is before start'}), 400
+    if (end - start).days + 1 > MAX_RANGE_DAYS:
+        return jsonify({'error': f'range is limited to {MAX_RANGE_DAYS} days'}), 400
+    
+    fields = [f.strip() for f in request.args.get('fields', ','.join(SCORE_FIELDS)).split(',') if f.strip()]
+    unknown = [f for f in fields if f not in SCORE_FIELDS]
+    if unknown or not fields:
+        return jsonify({'error': f'unknown fields: {unknown}', 'fields': SCORE_FIELDS}), 400
+    
+    fmt = request.args.get('format')
+    if fmt is None:
+        best = request.accept_mimetypes.best_match(['application/x-ndjson', 'application/json'])
+        fmt = 'json' if best == 'application/json' else 'ndjson'
+    if fmt not in ('ndjson', 'json'):
+        return jsonify({'error': "format must be 'ndjson' or 'json'"}), 400
+    
+    # Same data + same query = same body
+    etag = hashlib.sha1(repr((data_version(), start, end, fields, fmt)).encode()).hexdigest()
+    status = data_status()
+    if status['vix']['as_of'] is None:
+        return jsonify({'error': 'VIX history is unavailable, try again later'}), 503
+    matched = http_cache.matches(etag)
+    if matched:
+        return http_cache.not_modified(matched)
+    
+    rows = iter_score_rows(start, end, fields)
+    if fmt == 'ndjson':
+        body = (json.dumps(row) + '\n' for row in rows)
+        mimetype = 'application/x-ndjson'
+    else:
+        def body():
+            yield '['
+            for i, row in enumerate(rows):
+                yield (',' if i else '') + json.dumps(row)
+            yield ']'
+        body = body()
+        mimetype = 'application/json'
+    
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = http_cache.cache_control()
+    if status['stale']:
+        # Scored from the last good copy of these inputs
+        response.headers['X-Data-Stale'] = ', '.join(k for k in ('vix', 'earnings') if status[k]['stale'])
+    return response
+
+
+# /stream: comment line this often so proxies keep idle connections open
+HEARTBEAT_SECONDS = 15
+# Each open stream holds a server thread, so cap them
+MAX_STREAMS = int(os.environ.get('VOLATILITY_MAX_STREAMS', 100))
+_open_streams = 0
+_streams_lock = threading.Lock()
+_dashboard_event = (None, None)
+
+
+def dashboard_event():
+    """(generation, SSE message) for the current dashboard, serialized once per snapshot."""
+    global _dashboard_event
+    generation, payload = dashboard_cache.current()
+    if payload is None:
+        dashboard_cache.get()
+        generation, payload = dashboard_cache.current()
+    cached = _dashboard_event
+    if cached[0] != generation:
+        body = json.dumps(payload, sort_keys=True, default=str)
+        cached = _dashboard_event = (generation, f"id: {generation}\nevent: dashboard\ndata: {body}\n\n")
+    return cached
+
+
+@app.route('/stream')
+def stream():
+    """
+    Server-Sent Events: a 'dashboard' event with the full dashboard
+    (data, weekly, feds) now and whenever the snapshot changes.
+    
+    Idle clients just wait on the snapshot's condition variable and only
+    read its generation counter, so the cost is one sleeping connection
+    each, not a recompute or data check per tab. Without the background
+    refresher, new data reaches streams when a page request rebuilds the
+    snapshot. Past MAX_STREAMS open streams new ones get a 503.
+    """
+    global _open_streams
+    with _streams_lock:
+        if _open_streams >= MAX_STREAMS:
+            response = Response("Too many open streams, try again later\n", status=503, mimetype='text/plain')
+            response.headers['Retry-After'] = '30'
+            return response
+        _open_streams += 1
+    
+    def close_stream():
+        global _open_streams
+        with _streams_lock:
+            _open_streams -= 1
+    
+    last_id = request.headers.get('Last-Event-ID', '')
+    seen = int(last_id) if last_id.isdigit() else None
+    
+    def events():
+        nonlocal seen
+        yield "retry: 10000\n\n"
+        while True:
+            generation, message = dashboard_event()
+            if generation != seen:
+                seen = generation
+                yield message
+            elif dashboard_cache.wait(generation, HEARTBEAT_SECONDS) == generation:
+                yield ": keepalive\n\n"
+    
+    response = Response(events(), mimetype='text/event-stream')
+    # Runs when the client goes away, even if the body was never started
+    response.call_on_close(close_stream)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Stage timings, provider latency, cache hit rates and request latency for Prometheus."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
+    debug = True
+    # With the debug reloader, only the child process that serves requests refreshes
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_worker()
+    app.run(debug=debug, host='0.0.0.0', port=5001)
\ No newline at end of file
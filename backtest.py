@@ -0,0 +1,201 @@
+"""
+Backtest the catalyst score against forward returns.
+
+Scores every trading day with the vectorized range scorer, joins each day
+to the instrument's return over the next N trading days and summarizes
+hit rate and return distribution per score and per conviction bucket.
+
+Prices come from a local CSV cache (data/prices/<SYMBOL>.csv), downloaded
+through market_data the first time a symbol is used and again when the
+file does not reach back to --start or is missing the last trading day.
+--refresh downloads everything again.
+
+Usage:
+    python backtest.py                       # VXX, 5-day forward returns
+    python backtest.py --symbol SPY --horizon 10
+    python backtest.py --symbol ^VIX --start 2024-01-01
+    python backtest.py --refresh             # ignore the price cache
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from entry_score import calculate_scores_range
+from market_data import download_histories
+from scheduler import MARKET_CLOSE, MARKET_TZ
+from storage import data_path
+
+DEFAULT_START = '2023-01-01'
+# A cache starting this many days after --start still counts as covering
+# it (the start may be a weekend or holiday)
+START_SLACK_DAYS = 7
+
+
+def price_cache_path(symbol):
+    """CSV file holding the cached closes for a symbol."""
+    os.makedirs(data_path('prices'), exist_ok=True)
+    return os.path.join(data_path('prices'), f"{symbol.replace('^', '')}.csv")
+
+
+def last_close(now=None):
+    """New York time of the most recent weekday market close."""
+    now = now or datetime.now(MARKET_TZ)
+    day = now.date() if now.time() >= MARKET_CLOSE else now.date() - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return datetime.combine(day, MARKET_CLOSE, tzinfo=MARKET_TZ)
+
+
+def cached_range(symbol):
+    """(first, last) date in a symbol's cache file, or None if there is none."""
+    path = price_cache_path(symbol)
+    if not os.path.exists(path):
+        return None
+    dates = pd.read_csv(path, usecols=['date'], parse_dates=['date'])['date']
+    if dates.empty:
+        return None
+    return dates.iloc[0].normalize(), dates.iloc[-1].normalize()
+
+
+def needs_download(symbol, start=DEFAULT_START, now=None):
+    """
+    Is a symbol's cache missing, starting too late for `start`, or behind
+    the last trading day? A file written after that day's close counts as
+    current even without a row for it (the day was a market holiday).
+    """
+    cached = cached_range(symbol)
+    if cached is None:
+        return True
+    first, last = cached
+    if first > pd.Timestamp(start) + pd.Timedelta(days=START_SLACK_DAYS):
+        return True
+    close = last_close(now)
+    if last.date() >= close.date():
+        return False
+    return os.path.getmtime(price_cache_path(symbol)) < close.timestamp()
+
+
+def cache_prices(symbols, start=DEFAULT_START, refresh=False):
+    """Download the symbols whose cache is missing or stale, in one batched request."""
+    stale = [s for s in symbols if refresh or needs_download(s, start)]
+    if not stale:
+        return
+    # Never shrink a cache that already reaches back further than start
+    firsts = [cached[0] for cached in map(cached_range, stale) if cached is not None]
+    start = min([pd.Timestamp(start)] + firsts).strftime('%Y-%m-%d')
+    closes = download_histories(stale, start=start)
+    for symbol in stale:
+        closes[symbol].dropna().rename('close').rename_axis('date').to_csv(price_cache_path(symbol))
+
+
+def load_prices(symbol, start=DEFAULT_START, refresh=False):
+    """
+    Daily closes for a symbol from the local cache.
+    Downloads and caches them if the file is missing or stale (or refresh=True).
+    """
+    cache_prices([symbol], start=start, refresh=refresh)
+    
+    closes = pd.read_csv(price_cache_path(symbol), index_col='date', parse_dates=['date'])['close']
+    closes.index = pd.DatetimeIndex(closes.index).tz_localize(None).normalize()
+    return closes.astype(np.float64)
+
+
+def forward_returns(closes, horizon):
+    """Return from each close to the close `horizon` trading days later."""
+    values = closes.to_numpy()
+    returns = np.full(len(values), np.nan)
+    if len(values) > horizon:
+        returns[:-horizon] = values[horizon:] / values[:-horizon] - 1
+    return pd.Series(returns, index=closes.index, name='forward_return')
+
+
+def run_backtest(symbol='VXX', horizon=5, start=DEFAULT_START, end=None, refresh=False):
+    """
+    Score every trading day and join it to forward returns.
+    
+    Args:
+        refresh: Download prices again even if the cache looks current
+    
+    Returns:
+        DataFrame indexed by trading day with the score columns plus
+        'close' and 'forward_return' (NaN where the horizon runs past the data)
+    """
+    cache_prices([symbol, '^VIX'], start=start, refresh=refresh)
+    closes = load_prices(symbol, start=start)
+    closes = closes[closes.index >= pd.to_datetime(start)]
+    if end is not None:
+        closes = closes[closes.index <= pd.to_datetime(end)]
+    if closes.empty:
+        raise ValueError(f"No {symbol} prices between {start} and {end}")
+    
+    # Score with cached VIX history from the same start date, so early days
+    # are not missing their VIX flag
+    vix = load_prices('^VIX', start=start)
+    scores = calculate_scores_range(closes.index[0], closes.index[-1], vix_data=vix)
+    
+    results = scores.reindex(closes.index)
+    results['close'] = closes
+    results['forward_return'] = forward_returns(closes, horizon)
+    return results
+
+
+def summarize(results, by='score'):
+    """Hit rate and forward-return distribution per score (or 'conviction')."""
+    returns = results.dropna(subset=['forward_return'])
+    grouped = returns.groupby(by)['forward_return']
+    summary = pd.DataFrame({
+        'days': grouped.size(),
+        'hit_rate': (returns['forward_return'] > 0).groupby(returns[by]).mean(),
+        'mean': grouped.mean(),
+        'median': grouped.median(),
+        'std': grouped.std(),
+        'p10': grouped.quantile(0.10),
+        'p90': grouped.quantile(0.90),
+    })
+    if by == 'conviction':
+        summary = summary.reindex(['LOW', 'MEDIUM', 'HIGH']).dropna(how='all')
+    return summary
+
+
+def print_report(results, symbol, horizon, elapsed):
+    """Print the score and conviction tables."""
+    pct = lambda x: f"{x * 100:+.2f}%"
+    columns = ['mean', 'median', 'std', 'p10', 'p90']
+    
+    print("\n" + "="*70)
+    print(f"📊 BACKTEST: {symbol} {horizon}-day forward returns by catalyst score")
+    print(f"   {results.index[0]:%Y-%m-%d} → {results.index[-1]:%Y-%m-%d}, "
+          f"{len(results)} trading days, {elapsed * 1000:.0f} ms")
+    print("="*70)
+    
+    for by in ('score', 'conviction'):
+        summary = summarize(results, by)
+        summary['hit_rate'] = summary['hit_rate'].map(lambda x: f"{x * 100:.1f}%")
+        for col in columns:
+            summary[col] = summary[col].map(pct)
+        print(f"\nBy {by}:")
+        print(summary.to_string())
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the catalyst score")
+    parser.add_argument('--symbol', default='VXX', help="VXX, SPY, ^VIX, ...")
+    parser.add_argument('--horizon', type=int, default=5, help="Forward return horizon in trading days")
+    parser.add_argument('--start', default=DEFAULT_START)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--csv', help="Also write the per-day results to this file")
+    parser.add_argument('--refresh', action='store_true', help="Download prices again instead of using the cache")
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    results = run_backtest(args.symbol, args.horizon, args.start, args.end, args.refresh)
+    elapsed = time.perf_counter() - started
+    
+    print_report(results, args.symbol, args.horizon, elapsed)
+    if args.csv:
+        results.to_csv(args.csv)
@@ -1,30 +1,71 @@
-import yfinance as yf
+import threading
 import pandas as pd
+from vix_store import VixStore
+from market_data import download_history
 
-vix = yf.download('^VIX', period='2y')
 
-def is_vix_below_18(date, vix_data):
-    date = pd.to_datetime(date)
+def download_vix(start=None, period=None):
+    """Download daily VIX closes as a Series."""
+    return download_history('^VIX', start=start, period=period)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_vix_store():
+    """Process-wide VIX store, created on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = VixStore(download_vix)
+    return _store
+
+
+def get_vix_history():
+    """Stored VIX closes (updated incrementally from yfinance)."""
+    return get_vix_store().get_series()
+
+
+def get_close_prices(vix_data):
+    """Close prices of VIX data as a Series."""
+    if isinstance(vix_data, pd.Series):
+        return vix_data
     
     # Handle both single and multi-index columns
     if isinstance(vix_data.columns, pd.MultiIndex):
-        close_prices = vix_data['Close']['^VIX']
-    else:
-        close_prices = vix_data['Close']
-    
+        return vix_data['Close']['^VIX']
+    return vix_data['Close']
+
+
+def is_vix_below_18(date, vix_data=None):
+    date = pd.to_datetime(date)
+    if vix_data is None:
+        # Precomputed for every stored day
+        from vix_analytics import get_vix_analytics
+        from catalyst_index import to_days
+        return bool(get_vix_analytics().below_18_asof(to_days([date]))[0])
+    close_prices = get_close_prices(vix_data)
     close_price = close_prices.asof(date)
     
     return close_price < 18
 
+
+def __getattr__(name):
+    # `vix` used to be downloaded at import time; build it on first access now
+    if name == 'vix':
+        return get_vix_history()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # Test it
-test_date = '2024-10-17'
-result = is_vix_below_18(test_date, vix)
-print(f"VIX below 18 on {test_date}? {result}")
-
-# Also print the actual VIX value
-if isinstance(vix.columns, pd.MultiIndex):
-    vix_value = vix['Close']['^VIX'].asof(pd.to_datetime(test_date))
-else:
-    vix_value = vix['Close'].asof(pd.to_datetime(test_date))
+if __name__ == "__main__":
+    vix = get_vix_history()
+    
+    test_date = '2024-10-17'
+    result = is_vix_below_18(test_date, vix)
+    print(f"VIX below 18 on {test_date}? {result}")
     
-print(f"Actual VIX value: {vix_value:.2f}")
\ No newline at end of file
+    # Also print the actual VIX value
+    vix_value = vix.asof(pd.to_datetime(test_date))
+    print(f"Actual VIX value: {vix_value:.2f}")
@@ -0,0 +1,60 @@
+"""
+Startup benchmark: how long does `import entry_score` take in a fresh process?
+
+Each run starts a new interpreter so nothing is cached between runs.
+The second column preloads pandas/numpy first, which isolates the cost of
+our own modules from the third-party import time.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py entry_score app --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = """
+import sys, time
+{preload}
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, int('yfinance' in sys.modules))
+"""
+
+
+def time_import(module, preload='', runs=5):
+    """Return (median seconds, yfinance imported?) over fresh-process runs."""
+    times = []
+    loaded_yfinance = False
+    for _ in range(runs):
+        code = SNIPPET.format(module=module, preload=preload)
+        out = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT,
+                             capture_output=True, text=True, check=True)
+        # Modules may still print; the timing is always the last line
+        elapsed, yf_flag = out.stdout.strip().splitlines()[-1].split()
+        times.append(float(elapsed))
+        loaded_yfinance = loaded_yfinance or yf_flag == '1'
+    return statistics.median(times), loaded_yfinance
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('modules', nargs='*', default=['entry_score'])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+    
+    print(f"{'module':<28}{'cold import':>14}{'w/ pandas loaded':>20}{'yfinance?':>12}")
+    for module in args.modules:
+        cold, yf_loaded = time_import(module, runs=args.runs)
+        warm, _ = time_import(module, preload='import numpy, pandas', runs=args.runs)
+        print(f"{module:<28}{cold * 1000:>11.1f} ms{warm * 1000:>17.1f} ms"
+              f"{'yes' if yf_loaded else 'no':>12}")
+
+
+if __name__ == '__main__':
+    main()
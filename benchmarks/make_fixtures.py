@@ -0,0 +1,98 @@
+"""
+Synthetic market data fixtures for the offline benchmarks.
+
+Writes a small, deterministic data set (VIX and VXX closes, quarterly
+earnings dates for the mega caps) to benchmarks/fixtures in the layout
+FileProvider reads, by passing a seeded generator through
+RecordingProvider. Numbers are made up but shaped like the real thing,
+so a fresh checkout can run benchmarks/run.py without network access.
+The same seed always gives byte-identical files, which keeps the
+result fingerprints in baseline.json valid.
+
+Usage:
+    python benchmarks/make_fixtures.py
+    python benchmarks/make_fixtures.py --output /tmp/fixtures
+"""
+import argparse
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from market_data import DEFAULT_FIXTURE_DIR, MarketDataProvider, RecordingProvider
+from universe import MEGA_CAP_TICKERS
+
+SEED = 20240805
+START = '2023-01-03'
+END = '2025-12-31'
+SYMBOLS = ['^VIX', 'VXX']
+
+
+class SyntheticProvider(MarketDataProvider):
+    """Seeded closes and earnings calendars over START..END."""
+    
+    def __init__(self, seed=SEED):
+        self.seed = seed
+        self.days = pd.bdate_range(START, END)
+    
+    def _rng(self, name):
+        # One stream per symbol, so adding a symbol does not change the others
+        return np.random.default_rng([self.seed, sum(name.encode())])
+    
+    def _closes(self, symbol):
+        rng = self._rng(symbol)
+        n = len(self.days)
+        if symbol == '^VIX':
+            # Mean-reverting log level around 17 with occasional spikes above 30
+            log_vix = np.empty(n)
+            log_vix[0] = np.log(17.0)
+            shocks = rng.normal(0.0, 0.05, n) + np.where(rng.random(n) < 0.006, 0.4, 0.0)
+            for i in range(1, n):
+                log_vix[i] = log_vix[i - 1] + 0.1 * (np.log(17.0) - log_vix[i - 1]) + shocks[i]
+            values = np.exp(log_vix)
+        else:
+            # Decaying futures ETN: steady drag plus noise
+            values = 100.0 * np.exp(np.cumsum(rng.normal(-0.002, 0.03, n)))
+        return pd.Series(np.round(values, 4), index=self.days)
+    
+    def history(self, symbols, start=None, period=None):
+        symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+        return pd.concat({symbol: self._closes(symbol) for symbol in symbols}, axis=1)
+    
+    def earnings_dates(self, ticker):
+        # Four reports a year, each ticker on its own weekday a few weeks after quarter end
+        rng = self._rng(ticker)
+        weekday = int(rng.integers(0, 5))
+        offset = int(rng.integers(20, 40))
+        dates = []
+        for year in range(2023, 2027):
+            for month in (1, 4, 7, 10):
+                day = pd.Timestamp(year, month, 1) + pd.Timedelta(days=offset)
+                day += pd.Timedelta(days=(weekday - day.weekday()) % 7)
+                dates.append(day.strftime('%Y-%m-%d'))
+        return dates
+
+
+def make_fixtures(directory, tickers=MEGA_CAP_TICKERS):
+    """Replace the fixtures in directory with a fresh synthetic set."""
+    for kind in ('history', 'earnings'):
+        shutil.rmtree(os.path.join(directory, kind), ignore_errors=True)
+    recorder = RecordingProvider(SyntheticProvider(), directory)
+    recorder.history(SYMBOLS)
+    for ticker in tickers:
+        recorder.earnings_dates(ticker)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write synthetic benchmark fixtures")
+    parser.add_argument('--output', default=DEFAULT_FIXTURE_DIR)
+    args = parser.parse_args()
+    
+    make_fixtures(args.output)
+    print(f"Synthetic fixtures for {', '.join(SYMBOLS)} and {len(MEGA_CAP_TICKERS)} "
+          f"earnings calendars written to {args.output}")
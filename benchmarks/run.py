@@ -0,0 +1,197 @@
+"""
+Offline benchmark suite.
+
+Replays recorded market data (see market_data.py) so every run sees the
+same inputs and needs no network. The committed fixtures are synthetic
+(benchmarks/make_fixtures.py); --record replaces them with real data. For each case it reports median wall
+time, vendor calls (summed over the repeats) and peak traced memory, and
+compares them with benchmarks/baseline.json.
+
+Usage:
+    python benchmarks/make_fixtures.py         # regenerate the synthetic fixtures
+    python benchmarks/run.py --record          # with network: save real fixtures instead
+    python benchmarks/run.py --save-baseline   # store current numbers as the baseline
+    python benchmarks/run.py                   # run and compare with the baseline
+    python benchmarks/run.py --check           # exit 1 on a slowdown or changed result
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_ROOT, 'benchmarks', 'baseline.json')
+
+# Dates with known catalysts, used by the per-date cases
+SAMPLE_DATES = ['2024-07-31', '2024-11-07', '2025-10-29', '2025-06-15', '2023-12-13']
+
+
+def fingerprint(value):
+    """Short stable hash of a result, to spot behavior changes."""
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+def build_cases():
+    """(name, callable, deterministic?) for every benchmark case."""
+    import pandas as pd
+    import app
+    import backtest
+    import daily_volatility_score
+    import entry_score
+    
+    client = app.app.test_client()
+    
+    def entry_scores():
+        return [entry_score.calculate_entry_score(d)['score'] for d in SAMPLE_DATES]
+    
+    def range_one_year():
+        return entry_score.calculate_scores_range('2025-01-01', '2025-12-31')['score'].tolist()
+    
+    def route(path, cached):
+        def run():
+            if not cached:
+                app.dashboard_cache.invalidate()
+            response = client.get(path)
+            assert response.status_code == 200, f"{path} returned {response.status_code}"
+            return response.status_code
+        return run
+    
+    def cli_report():
+        with contextlib.redirect_stdout(io.StringIO()):
+            daily_volatility_score.print_market_volatility_report()
+    
+    def cli_batch_quarter():
+        dates = pd.date_range('2025-07-01', '2025-09-30', freq='D')
+        return daily_volatility_score.run_batch(dates).to_dict('records')
+    
+    def backtest_vxx():
+        results = backtest.run_backtest('VXX', horizon=5)
+        return backtest.summarize(results).round(6).to_dict()
+    
+    return [
+        ('calculate_entry_score x5', entry_scores, True),
+        ('calculate_scores_range 1y', range_one_year, True),
+        ('route / (uncached)', route('/', cached=False), False),
+        ('route /weekly (uncached)', route('/weekly', cached=False), False),
+        ('route /fed-calendar (uncached)', route('/fed-calendar', cached=False), False),
+        ('route /api/score (cached)', route('/api/score', cached=True), False),
+        ('cli report', cli_report, False),
+        ('cli batch 1 quarter', cli_batch_quarter, True),
+        ('backtest VXX 5d', backtest_vxx, True),
+    ]
+
+
+def run_case(fn, repeat):
+    """Time fn; then run it once more under tracemalloc for peak memory."""
+    import market_data
+    
+    calls_before = dict(market_data.CALL_COUNTS)
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    calls = {name: count - calls_before.get(name, 0)
+             for name, count in market_data.CALL_COUNTS.items()
+             if count - calls_before.get(name, 0)}
+    
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    
+    return {
+        'median_ms': round(statistics.median(times) * 1000, 3),
+        'min_ms': round(min(times) * 1000, 3),
+        'vendor_calls': sum(calls.values()),
+        'peak_kb': round(peak / 1024, 1),
+        'result': fingerprint(result),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--record', action='store_true',
+                        help="Call the live vendor and save fixtures (needs network)")
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--check', action='store_true',
+                        help="Exit 1 if a case is slower than --threshold x baseline or its result changed")
+    parser.add_argument('--threshold', type=float, default=1.5)
+    args = parser.parse_args()
+    
+    # Must be set before the modules below are imported
+    os.environ['MARKET_DATA_MODE'] = 'record' if args.record else 'replay'
+    os.environ['VOLATILITY_DATA_DIR'] = tempfile.mkdtemp(prefix='volatility-bench-')
+    sys.path.insert(0, REPO_ROOT)
+    
+    import entry_score
+    import market_data
+    
+    fixtures = market_data.get_fixture_dir()
+    if not args.record and not os.path.isdir(os.path.join(fixtures, 'history')):
+        print(f"No market data fixtures in {fixtures}. Run python benchmarks/make_fixtures.py "
+              f"(synthetic, offline) or python benchmarks/run.py --record (needs network) first.",
+              file=sys.stderr)
+        return 2
+    if args.check and not os.path.exists(BASELINE_PATH):
+        print(f"No baseline at {BASELINE_PATH} to check against. "
+              f"Run python benchmarks/run.py --save-baseline first.", file=sys.stderr)
+        return 2
+    
+    start = time.perf_counter()
+    entry_score.warm_up()
+    cold_ms = (time.perf_counter() - start) * 1000
+    print(f"Cold start (fill local stores from {os.environ['MARKET_DATA_MODE']}): "
+          f"{cold_ms:.1f} ms, vendor calls: {dict(market_data.CALL_COUNTS)}")
+    
+    results = {}
+    for name, fn, deterministic in build_cases():
+        results[name] = run_case(fn, 1 if args.record else args.repeat)
+        if not deterministic:
+            results[name]['result'] = None
+    
+    if args.record:
+        print(f"Fixtures saved to {market_data.get_fixture_dir()}")
+        return 0
+    
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    
+    failed = False
+    print(f"\n{'case':<34}{'median':>11}{'min':>11}{'calls':>7}{'peak':>11}{'vs base':>10}")
+    for name, r in results.items():
+        base = baseline.get(name)
+        note = ''
+        if base:
+            ratio = r['median_ms'] / base['median_ms'] if base['median_ms'] else 1.0
+            note = f"{ratio:.2f}x"
+            if ratio > args.threshold:
+                note += ' SLOWER'
+                failed = True
+            if r['result'] and base.get('result') and r['result'] != base['result']:
+                note += ' RESULT CHANGED'
+                failed = True
+        print(f"{name:<34}{r['median_ms']:>8.2f} ms{r['min_ms']:>8.2f} ms"
+              f"{r['vendor_calls']:>7.0f}{r['peak_kb']:>8.0f} KB{note:>10}")
+    
+    if args.save_baseline:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {BASELINE_PATH}")
+    
+    return 1 if args.check and failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
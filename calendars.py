@@ -0,0 +1,151 @@
+"""
+Catalyst calendars (FOMC, CPI, NFP) compiled from calendars.json.
+
+Published dates are listed per year in the file. Other years, from the
+first listed year up to `rules_years_ahead` past the current one, come
+from the file's rules (e.g. NFP on the first Friday of each month), and
+'overrides' then add or remove single dates. The file is read once and
+compiled into frozen structures: membership is a set lookup and a year's
+dates are a dict lookup, however many years are covered.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from types import MappingProxyType
+
+CALENDAR_FILE = os.environ.get(
+    'VOLATILITY_CALENDARS',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendars.json'))
+
+KINDS = ('fed', 'cpi', 'nfp')
+
+
+def _first_weekday_on_or_after(year, month, day, weekday):
+    start = date(year, month, day)
+    return start + timedelta(days=(weekday - start.weekday()) % 7)
+
+
+def apply_rule(rule, year):
+    """
+    Dates a rule gives for one year.
+    
+    Args:
+        rule: {'weekday': 0-6 (Monday=0), and either 'monthly': day of
+              month or 'anchors': ['MM-DD', ...]}. Each date is the first
+              such weekday on or after the anchor.
+    """
+    if 'anchors' in rule:
+        anchors = [(int(a[:2]), int(a[3:])) for a in rule['anchors']]
+    else:
+        anchors = [(month, int(rule['monthly'])) for month in range(1, 13)]
+    return [_first_weekday_on_or_after(year, month, day, rule['weekday']).isoformat()
+            for month, day in anchors]
+
+
+class Calendars:
+    """Compiled, read-only event calendars."""
+    
+    def __init__(self, spec, through_year, digest=''):
+        """
+        Args:
+            spec: Parsed calendars.json
+            through_year: Last year to fill in from rules
+            digest: Content hash of the file, folded into `version`
+        """
+        published = spec.get('published', {})
+        rules = spec.get('rules', {})
+        overrides = spec.get('overrides', {})
+        listed = [int(year) for kind in KINDS for year in published.get(kind, {})]
+        first_year = min(listed, default=through_year)
+        last_year = max([through_year] + listed)
+        
+        by_year = {}
+        sources = {}
+        added = set()
+        for kind in KINDS:
+            years = {}
+            for year in range(first_year, last_year + 1):
+                dates = published.get(kind, {}).get(str(year))
+                if dates is not None:
+                    sources[(kind, year)] = 'published'
+                elif kind in rules:
+                    dates = apply_rule(rules[kind], year)
+                    sources[(kind, year)] = 'rule'
+                else:
+                    dates = []
+                years[year] = set(dates)
+            
+            for day in overrides.get(kind, {}).get('add', []):
+                years.setdefault(int(day[:4]), set()).add(day)
+                added.add((kind, day))
+            for day in overrides.get(kind, {}).get('remove', []):
+                years.get(int(day[:4]), set()).discard(day)
+            by_year[kind] = MappingProxyType({year: tuple(sorted(dates)) for year, dates in years.items()})
+        
+        self._by_year = MappingProxyType(by_year)
+        self._all = MappingProxyType({kind: tuple(d for year in sorted(years) for d in years[year])
+                                      for kind, years in by_year.items()})
+        self._sets = MappingProxyType({kind: frozenset(dates) for kind, dates in self._all.items()})
+        self._sources = MappingProxyType(sources)
+        self._added = frozenset(added)
+        self.first_year, self.last_year = first_year, last_year
+        # Changes with the file contents and with how far rules reach
+        self.version = f"{spec.get('version', '0')}+{digest[:8]}+{last_year}"
+    
+    def dates(self, kind, year=None):
+        """Sorted 'YYYY-MM-DD' tuple for one year, or for every covered year."""
+        if year is None:
+            return self._all[kind]
+        return self._by_year[kind].get(int(year), ())
+    
+    def covers(self, year):
+        return self.first_year <= int(year) <= self.last_year
+    
+    def is_event(self, kind, day):
+        """Is this day ('YYYY-MM-DD', date or Timestamp) an event of this kind?"""
+        return str(day)[:10] in self._sets[kind]
+    
+    def source(self, kind, year):
+        """'published' or 'rule' (estimated) for a year's dates, None if not covered."""
+        return self._sources.get((kind, int(year)))
+    
+    def estimated(self, kind, day):
+        """Was this date worked out from a rule rather than published (or added by hand)?"""
+        day = str(day)[:10]
+        return self.source(kind, day[:4]) == 'rule' and (kind, day) not in self._added
+
+
+def load_calendars(path=CALENDAR_FILE, today=None):
+    """Read and compile a calendars file."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    spec = json.loads(raw)
+    today = today or datetime.now()
+    through_year = today.year + int(spec.get('rules_years_ahead', 2))
+    return Calendars(spec, through_year, hashlib.sha1(raw).hexdigest())
+
+
+_calendars = None
+_lock = threading.Lock()
+
+
+def get_calendars():
+    """Process-wide calendars, compiled on first use."""
+    global _calendars
+    with _lock:
+        if _calendars is None:
+            _calendars = load_calendars()
+        return _calendars
+
+
+# Show what is covered: python calendars.py
+if __name__ == "__main__":
+    calendars = get_calendars()
+    print(f"calendars.json version {calendars.version}")
+    for kind in KINDS:
+        print(f"\n{kind.upper()}:")
+        for year in range(calendars.first_year, calendars.last_year + 1):
+            dates = calendars.dates(kind, year)
+            print(f"  {year} ({calendars.source(kind, year)}): {', '.join(d[5:] for d in dates)}")
@@ -0,0 +1,234 @@
+import threading
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+import pandas as pd
+
+from fed_meetings import get_all_fed_dates
+from earnings import get_earnings_calendar, get_earnings_store, DEFAULT_TICKERS
+from economic_date import get_all_cpi_dates, get_all_nfp_dates
+from metrics import CACHE_REQUESTS
+from universe import weight_array
+
+NS_PER_DAY = 86_400 * 10**9
+
+
+def to_days(dates):
+    """Convert dates to an int64 array of day numbers (days since 1970-01-01)."""
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    return dates.values.astype('datetime64[D]').astype(np.int64)
+
+
+def to_day(date):
+    """Day number of a single date."""
+    return int(pd.Timestamp(date).normalize().value // NS_PER_DAY)
+
+
+def from_day(day):
+    """'YYYY-MM-DD' string of a day number."""
+    return str(np.datetime64(int(day), 'D'))
+
+
+def _year_bounds(days):
+    """First and last day number of each day's calendar year."""
+    years = np.asarray(days, dtype=np.int64).astype('datetime64[D]').astype('datetime64[Y]')
+    year_start = years.astype('datetime64[D]').astype(np.int64)
+    year_end = (years + 1).astype('datetime64[D]').astype(np.int64) - 1
+    return year_start, year_end
+
+
+class CatalystIndex:
+    """
+    Event dates by type, stored as sorted day numbers.
+    
+    Answers "is there an event of type X within +/- N days of D" with two
+    binary searches instead of parsing and comparing every event date.
+    Types are 'fed', 'cpi', 'nfp' and 'earnings' (all tickers; see
+    EarningsIndex for which ticker reported).
+    
+    With same_year=True the window is clipped to D's calendar year. That
+    matches the economic-data check, which only looks at D's year.
+    """
+    
+    def __init__(self, events):
+        """
+        Args:
+            events: {type: iterable of dates}
+        """
+        self._arrays = {}
+        self._lists = {}
+        for kind, dates in events.items():
+            days = np.unique(to_days(list(dates))) if len(dates) else np.array([], dtype=np.int64)
+            self._arrays[kind] = days
+            self._lists[kind] = days.tolist()
+    
+    def kinds(self):
+        return list(self._arrays)
+    
+    def days(self, kind):
+        """Sorted day numbers of one event type."""
+        return self._arrays[kind]
+    
+    def _bounds(self, date, window_days, same_year):
+        day = to_day(date)
+        lo, hi = day - window_days, day + window_days
+        if same_year:
+            year_start, year_end = _year_bounds([day])
+            lo, hi = max(lo, int(year_start[0])), min(hi, int(year_end[0]))
+        return day, lo, hi
+    
+    def is_event(self, kind, date):
+        """Is date itself an event of this type?"""
+        return self.any_within(kind, date, 0)
+    
+    def any_within(self, kind, date, window_days, same_year=False):
+        """Is there an event of this type within +/- window_days of date?"""
+        _, lo, hi = self._bounds(date, window_days, same_year)
+        days = self._lists[kind]
+        return bisect_right(days, hi) > bisect_left(days, lo)
+    
+    def events_within(self, kind, date, window_days, same_year=False):
+        """
+        Events of this type within +/- window_days of date.
+        
+        Returns:
+            List of ('YYYY-MM-DD', days_apart) tuples, oldest first
+        """
+        day, lo, hi = self._bounds(date, window_days, same_year)
+        days = self._lists[kind]
+        found = days[bisect_left(days, lo):bisect_right(days, hi)]
+        return [(from_day(d), abs(day - d)) for d in found]
+    
+    def any_within_many(self, kind, dates, window_days, same_year=False):
+        """Batch any_within: boolean array with one entry per target date."""
+        if isinstance(dates, np.ndarray) and dates.dtype.kind == 'i':
+            targets = dates.astype(np.int64)
+        else:
+            targets = to_days(dates)
+        lo = targets - window_days
+        hi = targets + window_days
+        if same_year:
+            year_start, year_end = _year_bounds(targets)
+            lo = np.maximum(lo, year_start)
+            hi = np.minimum(hi, year_end)
+        days = self._arrays[kind]
+        return np.searchsorted(days, hi, side='right') > np.searchsorted(days, lo, side='left')
+
+
+class EarningsIndex(CatalystIndex):
+    """
+    CatalystIndex of an earnings calendar that also knows which ticker
+    each date belongs to.
+    
+    Every (date, ticker) event sits in one array sorted by date, so a
+    window lookup is two binary searches whether the universe has six
+    tickers or five hundred, and a prefix sum of ticker weights gives
+    the weight reporting in any window in O(1).
+    """
+    
+    def __init__(self, calendar, weights=None):
+        """
+        Args:
+            calendar: {ticker: iterable of dates}
+            weights: Per-ticker weights in calendar order (equal if None)
+        """
+        self.tickers = list(calendar)
+        counts = [len(dates) for dates in calendar.values()]
+        all_dates = [d for dates in calendar.values() for d in dates]
+        days = to_days(all_dates) if all_dates else np.array([], dtype=np.int64)
+        ids = np.repeat(np.arange(len(self.tickers)), counts)
+        
+        # Sort by date (then ticker order) and drop repeated (date, ticker) pairs
+        order = np.lexsort((ids, days))
+        days, ids = days[order], ids[order]
+        keep = np.ones(len(days), dtype=bool)
+        keep[1:] = (days[1:] != days[:-1]) | (ids[1:] != ids[:-1])
+        self._event_days, self._event_ids = days[keep], ids[keep]
+        
+        super().__init__({})
+        self._arrays['earnings'] = np.unique(self._event_days)
+        self._lists['earnings'] = self._arrays['earnings'].tolist()
+        
+        if weights is None:
+            weights = np.full(len(self.tickers), 1.0 / max(len(self.tickers), 1))
+        self._weight_sums = np.concatenate([[0.0], np.cumsum(np.asarray(weights)[self._event_ids])])
+    
+    def _slices(self, dates, window_days):
+        targets = to_days(dates) if not isinstance(dates, np.ndarray) else dates.astype(np.int64)
+        lo = np.searchsorted(self._event_days, targets - window_days, side='left')
+        hi = np.searchsorted(self._event_days, targets + window_days, side='right')
+        return targets, lo, hi
+    
+    def tickers_within(self, date, window_days):
+        """
+        Earnings within +/- window_days of date.
+        
+        Returns:
+            List of (ticker, 'YYYY-MM-DD', days_apart), in ticker order
+        """
+        # Scalar path: no array conversion of the single date
+        day, lo, hi = self._bounds(date, window_days, False)
+        lo = int(np.searchsorted(self._event_days, lo, side='left'))
+        hi = int(np.searchsorted(self._event_days, hi, side='right'))
+        found = sorted(zip(self._event_ids[lo:hi].tolist(), self._event_days[lo:hi].tolist()))
+        return [(self.tickers[i], from_day(d), abs(day - d)) for i, d in found]
+    
+    def tickers_within_many(self, dates, window_days):
+        """Tickers reporting within +/- window_days of each date (list per date)."""
+        _, lo, hi = self._slices(dates, window_days)
+        names = np.array(self.tickers, dtype=object)
+        return [sorted(set(names[self._event_ids[a:b]])) if b > a else []
+                for a, b in zip(lo.tolist(), hi.tolist())]
+    
+    def weight_within_many(self, dates, window_days):
+        """
+        Share of the universe's weight reporting within +/- window_days of
+        each date (0..1). A ticker counts once per event in the window.
+        """
+        _, lo, hi = self._slices(dates, window_days)
+        return np.minimum(self._weight_sums[hi] - self._weight_sums[lo], 1.0)
+
+
+_calendar_index = None
+_earnings_indexes = {}
+_lock = threading.Lock()
+
+
+def get_calendar_index():
+    """Shared index of the 'fed', 'cpi' and 'nfp' calendars, built once."""
+    global _calendar_index
+    with _lock:
+        if _calendar_index is None:
+            _calendar_index = CatalystIndex({
+                'fed': get_all_fed_dates(),
+                'cpi': get_all_cpi_dates(),
+                'nfp': get_all_nfp_dates(),
+            })
+        return _calendar_index
+
+
+def get_earnings_index(tickers=DEFAULT_TICKERS, weights=None):
+    """
+    Shared EarningsIndex for a ticker list.
+    Rebuilt only when the earnings store has new data.
+    
+    Args:
+        weights: Optional {ticker: market cap}; equal weights if None
+    """
+    key = (tuple(tickers), tuple(sorted(weights.items())) if weights else None)
+    store = get_earnings_store()
+    cached = _earnings_indexes.get(key)
+    if cached is not None and cached[0] == store.version:
+        # Lets the store notice stale tickers and refresh them in the background
+        store.touch(tickers)
+        CACHE_REQUESTS.inc('earnings_index', 'hit')
+        return cached[1]
+    
+    CACHE_REQUESTS.inc('earnings_index', 'miss')
+    # Read the version first: a refresh landing mid-build then forces a rebuild
+    version = store.version
+    calendar = get_earnings_calendar(tickers)
+    with _lock:
+        index = EarningsIndex(calendar, weight_array(list(calendar), weights))
+        _earnings_indexes[key] = (version, index)
+        return index
@@ -1,10 +1,21 @@
-from datetime import datetime, timedelta
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 import pandas as pd
-import yfinance as yf
-from entry_score import calculate_entry_score
+from entry_score import calculate_entry_score, find_next_high_risk_day, score_dates, warm_up, BREAKDOWN_KEYS
 from fed_meetings import get_all_fed_dates
-from earnings import get_earnings_dates
-from economic_date import get_all_cpi_dates, get_all_nfp_dates
+from vix_analytics import get_vix_analytics, describe_context
+from snapshot import data_status, describe_data_status
+from earnings import earnings_catalysts
+from economic_date import check_economic_data_nearby
+import profiling
+
+BATCH_FORMATS = ['csv', 'parquet', 'jsonl']
+
+# Extra words for the report's VIX regime line
+REGIME_NOTES = {'Very Low': 'Market calm', 'Elevated': 'Caution advised', 'High': 'Market stress'}
 
 def get_volatility_outlook(target_date=None):
     """Get volatility score for any date."""
@@ -16,25 +27,15 @@ def get_volatility_outlook(target_date=None):
     
     target_str = target_date.strftime('%Y-%m-%d')
     
-    import sys
-    from io import StringIO
-    old_stdout = sys.stdout
-    sys.stdout = StringIO()
-    
     try:
         score_result = calculate_entry_score(target_str)
-        sys.stdout = old_stdout
-    except:
-        sys.stdout = old_stdout
+    except Exception as e:
+        # Unknown, not 0: a data outage is not a calm day
         score_result = {
-            'score': 0,
-            'conviction': 'NONE',
-            'breakdown': {
-                'fed_meeting': False,
-                'vix_low': False,
-                'earnings': False,
-                'economic_data': False
-            }
+            'score': None,
+            'conviction': 'UNKNOWN',
+            'breakdown': dict.fromkeys(BREAKDOWN_KEYS, False),
+            'error': f"{type(e).__name__}: {e}"
         }
     
     return score_result
@@ -45,13 +46,11 @@ def print_market_volatility_report():
     
     today = datetime.now()
     
-    # Get current VIX
-    vix = yf.download('^VIX', period='5d', progress=False)
-    if isinstance(vix.columns, pd.MultiIndex):
-        vix_close = vix['Close']['^VIX']
-    else:
-        vix_close = vix['Close']
-    current_vix = vix_close.iloc[-1]
+    # Get current VIX and its precomputed features
+    try:
+        vix = get_vix_analytics().latest()
+    except Exception:
+        vix = None
     
     # Get score
     score_result = get_volatility_outlook()
@@ -63,24 +62,30 @@ def print_market_volatility_report():
     print(f"📊 MARKET VOLATILITY REPORT - {today.strftime('%A, %B %d, %Y')}")
     print("="*70)
     
+    for warning in describe_data_status(data_status()):
+        print(f"\n⏳ {warning}")
+    
     # VIX Level
-    print(f"\n📈 CURRENT VIX LEVEL: {current_vix:.2f}")
-    
-    if current_vix < 15:
-        vix_desc = "Very Low (Market calm)"
-    elif current_vix < 20:
-        vix_desc = "Low to Moderate"
-    elif current_vix < 30:
-        vix_desc = "Elevated (Caution advised)"
+    if vix is None:
+        print(f"\n📈 CURRENT VIX LEVEL: UNAVAILABLE")
+        print(f"   Status: Unavailable (no VIX data)")
     else:
-        vix_desc = "High (Market stress)"
-    
-    print(f"   Status: {vix_desc}")
+        print(f"\n📈 CURRENT VIX LEVEL: {vix['close']:.2f}")
+        note = REGIME_NOTES.get(vix['regime'])
+        print(f"   Status: {vix['regime']}" + (f" ({note})" if note else ""))
+        print(f"   Past year: {describe_context(vix)}")
     
     # Volatility Score
-    print(f"\n🎯 VOLATILITY CATALYST SCORE: {score}/9")
+    if score is None:
+        print(f"\n🎯 VOLATILITY CATALYST SCORE: UNAVAILABLE")
+    else:
+        print(f"\n🎯 VOLATILITY CATALYST SCORE: {score}/9")
     
-    if score >= 7:
+    if score is None:
+        risk_level = "❔ UNKNOWN RISK"
+        description = f"Market data is unavailable - the score could not be computed ({score_result['error']})"
+        trader_advice = "Not a calm-day signal: check again once market data is back"
+    elif score >= 7:
         risk_level = "⚠️  HIGH RISK"
         description = "Multiple catalysts present - expect significant market swings"
         trader_advice = "Consider tighter stops, reduce position sizes, or wait for clarity"
@@ -116,21 +121,23 @@ def print_market_volatility_report():
     if breakdown['vix_low']:
         print(f"   💤 VIX Below 18 - Low volatility environment (may snap back)")
     
-    if len(catalysts_present) == 0:
+    if score is None:
+        print(f"   ❔ Catalysts unavailable")
+    elif len(catalysts_present) == 0:
         print(f"   ✅ No major catalysts - Typical trading day expected")
     
     # Trader-specific guidance
     print(f"\n💡 GUIDANCE FOR TRADERS:")
     print(f"   {trader_advice}")
     
-    if score >= 7:
+    if score is not None and score >= 7:
         print(f"\n⚠️  HEIGHTENED VOLATILITY WARNING:")
         print(f"   • Expect larger-than-normal price swings")
         print(f"   • Option premiums likely elevated")
         print(f"   • Consider waiting for post-catalyst clarity")
         print(f"   • If holding positions, set protective stops")
     
-    elif score >= 4:
+    elif score is not None and score >= 4:
         print(f"\n⚠️  VOLATILITY WATCH:")
         print(f"   • Some market-moving events today")
         print(f"   • Monitor news and announcements closely")
@@ -141,20 +148,17 @@ def print_market_volatility_report():
     
     # Find next high-score day in next 30 days
     found_high_score = False
-    for i in range(1, 31):
-        check_date = today + timedelta(days=i)
-        
-        if check_date.weekday() >= 5:
-            continue
-        
-        future_score = get_volatility_outlook(check_date)
-        
-        if future_score['score'] >= 7:
-            days_away = i
-            print(f"   ⚠️  High volatility expected on {check_date.strftime('%B %d')} ({days_away} days)")
-            print(f"      Score: {future_score['score']}/9")
-            found_high_score = True
-            break
+    try:
+        next_high = find_next_high_risk_day(today, threshold=7, horizon_days=30)
+    except Exception:
+        next_high = None
+    
+    if next_high:
+        check_date = pd.to_datetime(next_high['date'])
+        days_away = next_high['days_away']
+        print(f"   ⚠️  High volatility expected on {check_date.strftime('%B %d')} ({days_away} days)")
+        print(f"      Score: {next_high['score']}/9")
+        found_high_score = True
     
     if not found_high_score:
         # Check next Fed meeting
@@ -182,25 +186,194 @@ def print_market_volatility_report():
     print("="*70 + "\n")
 
 
-if __name__ == "__main__":
-    import sys
+def parse_date(value):
+    """
+    A date argument as 'YYYY-MM-DD'. Raises ArgumentTypeError, which
+    argparse reports as a usage error, if it is not a date.
+    """
+    try:
+        return pd.Timestamp(value).strftime('%Y-%m-%d')
+    except (ValueError, TypeError, OverflowError):
+        raise argparse.ArgumentTypeError(f"invalid date {value!r} (expected YYYY-MM-DD)") from None
+
+
+def read_dates_file(path):
+    """
+    Dates from a file, one per line ('#' comments and blank lines ignored); '-' is stdin.
+    Only the first comma-separated field counts. Raises ArgumentTypeError naming the bad line.
+    """
+    f = sys.stdin if path == '-' else open(path)
+    try:
+        lines = [line.split('#', 1)[0].strip() for line in f]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    dates = []
+    for number, line in enumerate(lines, 1):
+        if line:
+            try:
+                dates.append(parse_date(line.split(',')[0].strip()))
+            except argparse.ArgumentTypeError as e:
+                raise argparse.ArgumentTypeError(f"{path}, line {number}: {e}") from None
+    return dates
+
+
+def score_batch(dates):
+    """
+    Scores plus the releases behind them for many dates.
     
-    if len(sys.argv) > 1:
-        # Check specific date
-        target_date = sys.argv[1]
-        print(f"\nGenerating report for {target_date}...\n")
-        
-        score_result = get_volatility_outlook(target_date)
-        score = score_result['score']
-        
-        print(f"Volatility Score: {score}/9")
-        
-        if score >= 7:
-            print("⚠️  HIGH VOLATILITY expected - Multiple catalysts present")
-        elif score >= 4:
-            print("⚠️  MODERATE VOLATILITY - Some catalysts present")
-        else:
-            print("✅ LOW VOLATILITY - Normal trading conditions")
+    Returns:
+        DataFrame with one row per date: score, conviction, the breakdown
+        flags, 'earnings_tickers' and 'economic_releases' (lists)
+    """
+    scores = score_dates(dates)
+    details = earnings_catalysts(scores.index)
+    scores['earnings_tickers'] = details['earnings_tickers'].to_numpy()
+    # Economic releases are looked up per date
+    scores['economic_releases'] = [
+        [f"{r['type'].upper()} {r['date']}" for r in check_economic_data_nearby(d)['releases']]
+        for d in scores.index.strftime('%Y-%m-%d')
+    ]
+    scores = scores.reset_index()
+    scores['date'] = scores['date'].dt.strftime('%Y-%m-%d')
+    return scores[['date', 'score', 'conviction'] + BREAKDOWN_KEYS +
+                  ['earnings_tickers', 'economic_releases']]
+
+
+def run_batch(dates, workers=1):
+    """
+    Score dates in this process, or split across `workers` processes.
+    
+    Market data is loaded once up front so worker processes read it from
+    the local stores instead of downloading it again.
+    """
+    dates = pd.DatetimeIndex(pd.to_datetime(dates)).normalize().unique().sort_values()
+    warm_up()
+    if workers <= 1 or len(dates) < 2 * workers:
+        return score_batch(dates)
+    
+    chunk = -(-len(dates) // workers)
+    chunks = [dates[i:i + chunk] for i in range(0, len(dates), chunk)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        frames = list(pool.map(score_batch, chunks))
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_batch(frame, fmt, output=None):
+    """Write batch results as csv, parquet or jsonl to a file (or stdout)."""
+    if fmt == 'parquet':
+        try:
+            frame.to_parquet(output, index=False)
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow (pip install pyarrow)")
+    elif fmt == 'jsonl':
+        frame.to_json(output or sys.stdout, orient='records', lines=True)
     else:
-        # Today's report
-        print_market_volatility_report()
\ No newline at end of file
+        flat = frame.copy()
+        for column in ('earnings_tickers', 'economic_releases'):
+            flat[column] = flat[column].map(';'.join)
+        flat.to_csv(output or sys.stdout, index=False)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Volatility report for today, one date, or a batch of dates")
+    parser.add_argument('date', nargs='?', type=parse_date, help="Score a single date (YYYY-MM-DD)")
+    parser.add_argument('--start', type=parse_date, help="Batch: first date of a range")
+    parser.add_argument('--end', type=parse_date,
+                        help="Batch: last date of a range (default: same as --start)")
+    parser.add_argument('--dates-file', help="Batch: file with one date per line ('-' for stdin)")
+    parser.add_argument('--format', choices=BATCH_FORMATS,
+                        help="Batch output format (default: from --output's extension, else csv)")
+    parser.add_argument('--output', '-o', help="Batch output file (default: stdout)")
+    parser.add_argument('--workers', type=int, default=1, help="Batch: processes to score with")
+    parser.add_argument('--weekdays', action='store_true', help="Batch: skip Saturdays and Sundays")
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=profiling.KINDS,
+                        help="Profile this run (cprofile by default, or sample) and print the "
+                             "hotspots; --workers children are not included")
+    parser.add_argument('--profile-output', help="Profile file (default: data/profiles/cli-<time>.pstats "
+                                                 "or .folded)")
+    args = parser.parse_args(argv)
+    
+    args.batch = bool(args.start or args.dates_file)
+    if args.end and not args.start:
+        parser.error("--end needs --start")
+    if args.end and args.end < args.start:
+        parser.error(f"--end {args.end} is before --start {args.start}")
+    # Read the file now so a bad line is a usage error, not a traceback mid-run
+    args.file_dates = []
+    if args.dates_file:
+        try:
+            args.file_dates = read_dates_file(args.dates_file)
+        except (OSError, argparse.ArgumentTypeError) as e:
+            parser.error(f"--dates-file: {e}")
+    if args.format is None:
+        extension = (args.output or '').rsplit('.', 1)[-1].lower()
+        args.format = {'parquet': 'parquet', 'jsonl': 'jsonl', 'ndjson': 'jsonl'}.get(extension, 'csv')
+    if args.format == 'parquet' and not args.output:
+        parser.error("--format parquet needs --output")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile_output and not args.profile:
+        args.profile = 'cprofile'
+    if not args.profile:
+        return run(args)
+    
+    with profiling.Profiler(args.profile) as profiler:
+        run(args)
+    profiler.report('cli', args.profile_output)
+
+
+def run(args):
+    """Report or batch run for parsed arguments."""
+    if not args.batch:
+        if args.date:
+            # Check specific date
+            target_date = args.date
+            print(f"\nGenerating report for {target_date}...\n")
+            
+            score_result = get_volatility_outlook(target_date)
+            score = score_result['score']
+            
+            if score is None:
+                print(f"Volatility Score: UNAVAILABLE ({score_result['error']})")
+            else:
+                print(f"Volatility Score: {score}/9")
+            
+            if score is None:
+                print("❔ UNKNOWN - market data is unavailable, not a low-volatility day")
+            elif score >= 7:
+                print("⚠️  HIGH VOLATILITY expected - Multiple catalysts present")
+            elif score >= 4:
+                print("⚠️  MODERATE VOLATILITY - Some catalysts present")
+            else:
+                print("✅ LOW VOLATILITY - Normal trading conditions")
+        else:
+            # Today's report
+            print_market_volatility_report()
+        return
+    
+    dates = []
+    if args.start:
+        dates += list(pd.date_range(args.start, args.end or args.start, freq='D'))
+    dates += args.file_dates
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    if args.weekdays:
+        dates = dates[dates.weekday < 5]
+    
+    started = time.perf_counter()
+    frame = run_batch(dates, workers=args.workers)
+    elapsed = time.perf_counter() - started
+    write_batch(frame, args.format, args.output)
+    
+    # Keep stdout clean for the data
+    rate = len(frame) / elapsed if elapsed > 0 else float('inf')
+    print(f"Scored {len(frame)} dates in {elapsed:.2f}s ({rate:,.0f} dates/s, "
+          f"{args.workers} worker{'s' if args.workers != 1 else ''})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
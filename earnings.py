@@ -1,47 +1,158 @@
-import yfinance as yf
+import os
+import threading
 import pandas as pd
+from earnings_store import EarningsStore
+from market_data import fetch_earnings_dates
+from universe import get_default_universe
 
-def get_earnings_dates(ticker, start_date='2023-01-01', end_date='2025-12-31'):
-    """
-    Get earnings dates for a ticker using yfinance.
-    """
-    try:
-        stock = yf.Ticker(ticker)
-        # Get earnings calendar
-        earnings_dates = stock.earnings_dates
-        
-        if earnings_dates is not None and not earnings_dates.empty:
-            # Filter by date range and extract dates
-            earnings_dates = earnings_dates.index.tolist()
-            earnings_dates = [d.strftime('%Y-%m-%d') for d in earnings_dates 
-                            if start_date <= d.strftime('%Y-%m-%d') <= end_date]
-            return earnings_dates
-        return []
-    except:
-        return []
-
-
-def check_earnings_overlap(fed_date, tickers=['AAPL', 'MSFT', 'GOOGL', 'META', 'AMZN', 'NVDA'], window_days=5):
-    """
-    Auto-check earnings overlap by pulling live data from yfinance.
-    """
-    fed_dt = pd.to_datetime(fed_date)
-    L = []
-    for ticker in tickers:
-        earnings_dates = get_earnings_dates(ticker)
-        
-        for earnings_date in earnings_dates:
-            earnings_dt = pd.to_datetime(earnings_date)
-            days_apart = abs((fed_dt - earnings_dt).days)
-            
-            if days_apart <= window_days:
-                print(f"  Found: {ticker} earnings on {earnings_date} ({days_apart} days from Fed)")
-                L += [ticker]
-    if len(L) > 0:
-        print(*L)
-        return True
-    else:
-        return False
+# EARNINGS_UNIVERSE=sp100 (or a watchlist path) widens this from the six mega caps
+DEFAULT_UNIVERSE = get_default_universe()
+DEFAULT_TICKERS = DEFAULT_UNIVERSE.tickers
+DEFAULT_WEIGHTS = DEFAULT_UNIVERSE.weights
+
+# EARNINGS_MIN_WEIGHT=0.1 makes the earnings catalyst need 10% of the universe's
+# weight reporting within the window; 0 (the default) means any one ticker
+DEFAULT_MIN_WEIGHT = float(os.environ.get('EARNINGS_MIN_WEIGHT', 0))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_earnings_store():
+    """Process-wide earnings store, created on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EarningsStore(fetch_earnings_dates)
+    return _store
+
+
+def get_earnings_dates(ticker, start_date=None, end_date=None):
+    """
+    Get earnings dates for a ticker from the local earnings store.
+    """
+    return get_earnings_calendar([ticker], start_date, end_date)[ticker]
+
+
+def get_earnings_calendar(tickers, start_date=None, end_date=None):
+    """
+    Get earnings dates for several tickers at once: {ticker: [dates]}.
+    Tickers missing from the store are fetched concurrently.
+    
+    Args:
+        start_date, end_date: Optional 'YYYY-MM-DD' bounds (inclusive);
+            None keeps every date the store has on that side
+    """
+    calendar = get_earnings_store().get_many(tickers)
+    # Filter by date range
+    start_date = start_date or '0000-00-00'
+    end_date = end_date or '9999-99-99'
+    return {ticker: [d for d in dates if start_date <= d <= end_date]
+            for ticker, dates in calendar.items()}
+
+
+def find_earnings_overlap(fed_date, tickers=DEFAULT_TICKERS, window_days=5):
+    """
+    Earnings releases within window_days of a date.
+    
+    Returns:
+        List of dicts with 'ticker', 'date' and 'days_apart'
+    """
+    from catalyst_index import get_earnings_index
+    index = get_earnings_index(tickers)
+    return [{'ticker': ticker, 'date': earnings_date, 'days_apart': days_apart}
+            for ticker, earnings_date, days_apart in index.tickers_within(fed_date, window_days)]
+
+
+def _weighted_index(tickers, weights):
+    from catalyst_index import get_earnings_index
+    if weights is None and tickers == DEFAULT_TICKERS:
+        weights = DEFAULT_WEIGHTS
+    return get_earnings_index(tickers, weights)
+
+
+def _triggered(earnings_index, days, window_days, min_weight, weight=None):
+    if min_weight is None:
+        min_weight = DEFAULT_MIN_WEIGHT
+    if not min_weight:
+        return earnings_index.any_within_many('earnings', days, window_days)
+    if weight is None:
+        weight = earnings_index.weight_within_many(days, window_days)
+    # Tolerate rounding in the prefix sums
+    return weight >= min_weight - 1e-9
+
+
+def earnings_mask(days, tickers=DEFAULT_TICKERS, window_days=5, weights=None, min_weight=None):
+    """
+    The earnings catalyst (bool array) for day numbers, as the scorers count it.
+    Arguments as for earnings_catalysts.
+    """
+    return _triggered(_weighted_index(tickers, weights), days, window_days, min_weight)
+
+
+def earnings_catalysts(dates, tickers=DEFAULT_TICKERS, window_days=5, weights=None, min_weight=None):
+    """
+    Earnings catalyst for many dates across a whole universe at once.
+    
+    Args:
+        weights: {ticker: market cap}; defaults to the universe's weights
+                 when scoring DEFAULT_TICKERS, else equal weights
+        min_weight: Share of the universe's weight that has to report
+                    within the window (e.g. 0.1); 0 means any one ticker.
+                    Defaults to EARNINGS_MIN_WEIGHT.
+    
+    Returns:
+        DataFrame indexed by date with 'earnings' (bool), 'earnings_weight'
+        (share of weight reporting, 0..1) and 'earnings_tickers' (list)
+    """
+    from catalyst_index import to_days
+    index = pd.DatetimeIndex(pd.to_datetime(dates)).normalize()
+    index.name = 'date'
+    days = to_days(index)
+    earnings_index = _weighted_index(tickers, weights)
+    
+    weight = earnings_index.weight_within_many(days, window_days)
+    triggered = _triggered(earnings_index, days, window_days, min_weight, weight)
+    return pd.DataFrame({
+        'earnings': triggered,
+        'earnings_weight': weight,
+        'earnings_tickers': earnings_index.tickers_within_many(days, window_days),
+    }, index=index)
+
+
+def ingest_earnings(tickers, refresh=False):
+    """
+    Load many tickers into the local earnings store in one go
+    (EARNINGS_FETCH_WORKERS requests at a time).
+    
+    Args:
+        refresh: Re-fetch every ticker instead of only missing ones
+    
+    Returns:
+        {ticker: number of earnings dates stored}
+    """
+    store = get_earnings_store()
+    calendar = store.refresh_many(tickers) if refresh else store.get_many(tickers)
+    return {ticker: len(dates) for ticker, dates in calendar.items()}
+
+
+def check_earnings_overlap(fed_date, tickers=DEFAULT_TICKERS, window_days=5, log=None):
+    """
+    Auto-check earnings overlap using the local earnings store
+    (refreshed from yfinance in the background).
+    
+    Args:
+        log: Optional callable that receives each diagnostic line (e.g. print)
+    """
+    found = find_earnings_overlap(fed_date, tickers, window_days)
+    if log:
+        for match in found:
+            log(f"  Found: {match['ticker']} earnings on {match['date']} "
+                f"({match['days_apart']} days from Fed)")
+        if found:
+            log(' '.join(match['ticker'] for match in found))
+    return len(found) > 0
 
 
 # Test it
@@ -49,5 +160,5 @@ if __name__ == "__main__":
     print("Testing Auto Earnings Detection:\n")
     
     print("Oct 29, 2025 Fed meeting:")
-    result = check_earnings_overlap('2025-10-29')
+    result = check_earnings_overlap('2025-10-29', log=print)
     print(f"Overlap? {result}\n")
\ No newline at end of file
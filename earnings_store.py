@@ -0,0 +1,245 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from metrics import CACHE_REQUESTS
+from resilience import runs_inline
+from storage import connect, data_path
+
+# Earnings calendars move rarely - refresh twice a day by default
+DEFAULT_TTL = float(os.environ.get('EARNINGS_CACHE_TTL', 12 * 60 * 60))
+
+# Upper bound on simultaneous vendor requests
+MAX_FETCH_WORKERS = int(os.environ.get('EARNINGS_FETCH_WORKERS', 8))
+
+# After a failed fetch, wait this long before asking the vendor again
+FAILURE_RETRY = 5 * 60
+
+# touch() scans a ticker list for stale entries at most this often
+TOUCH_INTERVAL = 60
+
+
+class EarningsStore:
+    """
+    Local earnings calendar keyed by ticker, persisted in SQLite.
+    
+    Reads are served from memory. A ticker older than `ttl` seconds is
+    still returned as-is while a background thread refreshes it
+    (stale-while-revalidate). Only a ticker that has never been fetched
+    blocks on the vendor.
+    
+    Fetches run on a bounded thread pool, and a ticker has at most one
+    fetch in flight: concurrent callers asking for it share the same future.
+    """
+    
+    def __init__(self, fetcher, path=None, ttl=DEFAULT_TTL, max_workers=MAX_FETCH_WORKERS):
+        """
+        Args:
+            fetcher: Callable ticker -> list of 'YYYY-MM-DD' strings.
+                     Should raise on failure so good data is not overwritten.
+            path: SQLite file (default: data/earnings.sqlite)
+            ttl: Seconds before a ticker is considered stale
+            max_workers: Most vendor requests running at once
+        """
+        self.fetcher = fetcher
+        self.path = path or data_path('earnings.sqlite')
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._cache = {}
+        self._inflight = {}
+        # {ticker: error} for tickers whose last fetch failed
+        self._errors = {}
+        # {tuple of tickers: time of the last touch()}
+        self._touched = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='earnings-fetch')
+        self._loaded = False
+        # Bumped whenever any ticker's dates change, so indexes know to rebuild
+        self.version = 0
+    
+    def _connect(self):
+        conn = connect(self.path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS earnings_dates (
+                ticker TEXT NOT NULL,
+                date TEXT NOT NULL,
+                PRIMARY KEY (ticker, date)
+            )""")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS earnings_fetches (
+                ticker TEXT PRIMARY KEY,
+                fetched_at REAL NOT NULL
+            )""")
+        return conn
+    
+    def _read(self, conn, tickers=None):
+        """Read {ticker: (fetched_at, dates)} from disk."""
+        query_fetches = "SELECT ticker, fetched_at FROM earnings_fetches"
+        query_dates = "SELECT ticker, date FROM earnings_dates"
+        params = ()
+        if tickers is not None:
+            marks = ','.join('?' * len(tickers))
+            query_fetches += f" WHERE ticker IN ({marks})"
+            query_dates += f" WHERE ticker IN ({marks})"
+            params = tuple(tickers)
+        
+        dates = {}
+        for ticker, date in conn.execute(query_dates + " ORDER BY date", params):
+            dates.setdefault(ticker, []).append(date)
+        
+        return {ticker: (fetched_at, tuple(dates.get(ticker, ())))
+                for ticker, fetched_at in conn.execute(query_fetches, params)}
+    
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            conn = self._connect()
+            try:
+                self._cache.update(self._read(conn))
+            finally:
+                conn.close()
+            self._loaded = True
+    
+    def _save(self, ticker, fetched_at, dates):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM earnings_dates WHERE ticker = ?", (ticker,))
+                conn.executemany("INSERT OR IGNORE INTO earnings_dates VALUES (?, ?)",
+                                 [(ticker, d) for d in dates])
+                conn.execute("INSERT OR REPLACE INTO earnings_fetches VALUES (?, ?)",
+                             (ticker, fetched_at))
+        finally:
+            conn.close()
+    
+    def _fetch(self, ticker):
+        """Fetch one ticker from the vendor and persist it. Returns its dates."""
+        # Another process may have refreshed it already
+        conn = self._connect()
+        try:
+            on_disk = self._read(conn, [ticker]).get(ticker)
+        finally:
+            conn.close()
+        if on_disk is not None and time.time() - on_disk[0] <= self.ttl:
+            self._set(ticker, on_disk)
+            return on_disk[1]
+        
+        try:
+            dates = tuple(sorted(set(self.fetcher(ticker))))
+        except Exception as e:
+            # Keep serving what we had (marked stale); retry after a short back-off
+            previous = self._cache.get(ticker) or on_disk
+            dates = previous[1] if previous else ()
+            with self._lock:
+                self._cache[ticker] = (time.time() - self.ttl + FAILURE_RETRY, dates)
+                self._errors[ticker] = f"{type(e).__name__}: {e}"
+            return dates
+        
+        with self._lock:
+            self._errors.pop(ticker, None)
+        fetched_at = time.time()
+        self._save(ticker, fetched_at, dates)
+        self._set(ticker, (fetched_at, dates))
+        return dates
+    
+    def _set(self, ticker, entry):
+        with self._lock:
+            previous = self._cache.get(ticker)
+            if previous is None or previous[1] != entry[1]:
+                self.version += 1
+            self._cache[ticker] = entry
+    
+    def _submit(self, ticker):
+        """Start a fetch for ticker, or join the one already in flight."""
+        with self._lock:
+            future = self._inflight.get(ticker)
+            if future is None:
+                future = self._executor.submit(self._fetch, ticker)
+                self._inflight[ticker] = future
+                future.add_done_callback(lambda f: self._finish(ticker, f))
+            return future
+    
+    def _finish(self, ticker, future):
+        with self._lock:
+            if self._inflight.get(ticker) is future:
+                del self._inflight[ticker]
+    
+    def refresh(self, ticker):
+        """Fetch one ticker from the vendor now. Returns its dates."""
+        return self._submit(ticker).result()
+    
+    def refresh_many(self, tickers):
+        """Fetch several tickers concurrently. Returns {ticker: dates}."""
+        if runs_inline():
+            # Being profiled: fetch on this thread so the profile shows the vendor calls
+            return {ticker: self._fetch(ticker) for ticker in tickers}
+        futures = {ticker: self._submit(ticker) for ticker in tickers}
+        wait(futures.values())
+        return {ticker: future.result() for ticker, future in futures.items()}
+    
+    def get_many(self, tickers):
+        """
+        Earnings dates for several tickers: {ticker: sorted 'YYYY-MM-DD' tuple}.
+        
+        Tickers never seen before are fetched together and waited on;
+        stale ones are refreshed in the background.
+        """
+        self._load()
+        result = {}
+        missing = []
+        for ticker in tickers:
+            entry = self._cache.get(ticker)
+            if entry is None:
+                CACHE_REQUESTS.inc('earnings', 'miss')
+                missing.append(ticker)
+                continue
+            if time.time() - entry[0] > self.ttl:
+                CACHE_REQUESTS.inc('earnings', 'stale')
+                self._submit(ticker)
+            else:
+                CACHE_REQUESTS.inc('earnings', 'hit')
+            result[ticker] = entry[1]
+        
+        if missing:
+            result.update(self.refresh_many(missing))
+        return {ticker: result[ticker] for ticker in tickers}
+    
+    def touch(self, tickers):
+        """
+        Start background refreshes for stale or missing tickers without
+        waiting or copying any dates. Scans a given list at most once per
+        TOUCH_INTERVAL, so it is cheap enough for every lookup.
+        """
+        key = tuple(tickers)
+        now = time.time()
+        if now - self._touched.get(key, 0.0) < TOUCH_INTERVAL:
+            return
+        self._touched[key] = now
+        self._load()
+        for ticker in key:
+            entry = self._cache.get(ticker)
+            if entry is None or now - entry[0] > self.ttl:
+                self._submit(ticker)
+    
+    def get(self, ticker):
+        """Earnings dates for a ticker ('YYYY-MM-DD' strings, sorted)."""
+        return self.get_many([ticker])[ticker]
+    
+    def status(self, tickers):
+        """
+        Which of these tickers are served from old data because their
+        last fetch failed.
+        
+        Returns:
+            Dict with 'stale' (bool), 'tickers' (the failing tickers) and
+            'missing' (failing tickers with no dates at all)
+        """
+        with self._lock:
+            failing = [t for t in tickers if t in self._errors]
+            missing = [t for t in failing if not self._cache.get(t, (0, ()))[1]]
+            return {'stale': bool(failing), 'tickers': failing, 'missing': missing,
+                    'error': self._errors[failing[0]] if failing else None}
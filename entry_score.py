@@ -1,11 +1,19 @@
-from below18 import is_vix_below_18, vix
-from fed_meetings import get_all_fed_dates
-from earnings import check_earnings_overlap
+from below18 import is_vix_below_18, get_close_prices
+from earnings import earnings_mask, find_earnings_overlap, DEFAULT_TICKERS, DEFAULT_WEIGHTS
 from economic_date import check_economic_data_nearby
+from catalyst_index import get_calendar_index, get_earnings_index, to_days
+from vix_analytics import get_vix_analytics
+from metrics import STAGE_SECONDS
+import numpy as np
 import pandas as pd
 
+BREAKDOWN_KEYS = ['fed_meeting', 'vix_low', 'earnings', 'economic_data']
 
-def calculate_entry_score(target_date):
+# Points per catalyst (see calculate_entry_score)
+POINTS = {'fed_meeting': 2, 'vix_low': 2, 'earnings': 3, 'economic_data': 2}
+
+
+def calculate_entry_score(target_date, log=None):
     """
     Calculate volatility catalyst score for any date.
     
@@ -22,58 +30,74 @@ def calculate_entry_score(target_date):
     - MEDIUM: 4-6 points
     - LOW: 0-3 points
     
+    Args:
+        target_date: Date to score (string 'YYYY-MM-DD')
+        log: Optional callable that receives each diagnostic line (e.g. print).
+             Scoring is silent without it, so it is safe to call from threads.
+    
     Returns:
-        Dict with score and breakdown
+        Dict with score, conviction, breakdown and the matching
+        'earnings_releases' / 'economic_releases'
     """
+    say = log or (lambda line: None)
     score = 0
     breakdown = {}
     
-    print(f"\n{'='*50}")
-    print(f"Entry Score for {target_date}")
-    print(f"{'='*50}")
+    say(f"\n{'='*50}")
+    say(f"Entry Score for {target_date}")
+    say(f"{'='*50}")
     
     # Check 1: Is it a Fed meeting?
-    fed_dates = get_all_fed_dates()
-    is_fed_meeting = target_date in fed_dates
+    with STAGE_SECONDS.time('entry.fed'):
+        is_fed_meeting = get_calendar_index().is_event('fed', target_date)
     if is_fed_meeting:
         score += 2
-        print("✓ Fed meeting date: +2 points")
+        say("✓ Fed meeting date: +2 points")
     else:
-        print("✗ Not a Fed meeting: 0 points")
+        say("✗ Not a Fed meeting: 0 points")
     breakdown['fed_meeting'] = is_fed_meeting
     
     # Check 2: VIX level
-    vix_check = is_vix_below_18(target_date, vix)
+    with STAGE_SECONDS.time('entry.vix'):
+        vix_check = bool(is_vix_below_18(target_date))
     if vix_check:
         score += 2
-        print("✓ VIX below 18: +2 points")
+        say("✓ VIX below 18: +2 points")
     else:
-        print("✗ VIX NOT below 18: 0 points")
+        say("✗ VIX NOT below 18: 0 points")
     breakdown['vix_low'] = vix_check
     
     # Check 3: Earnings overlap
-    print("\nChecking earnings overlap:")
-    earnings_check = check_earnings_overlap(target_date, window_days=5)
+    say("\nChecking earnings overlap:")
+    with STAGE_SECONDS.time('entry.earnings'):
+        earnings_releases = find_earnings_overlap(target_date, window_days=5)
+    for match in earnings_releases:
+        say(f"  Found: {match['ticker']} earnings on {match['date']} ({match['days_apart']} days from Fed)")
+    # With EARNINGS_MIN_WEIGHT set, enough of the universe's weight has to report
+    earnings_check = bool(earnings_releases) and bool(earnings_mask(to_days([target_date]), window_days=5)[0])
     if earnings_check:
         score += 3
-        print("✓ Big tech earnings nearby: +3 points")
+        say("✓ Big tech earnings nearby: +3 points")
+    elif earnings_releases:
+        say("✗ Earnings nearby, but below EARNINGS_MIN_WEIGHT of the universe: 0 points")
     else:
-        print("✗ No earnings overlap: 0 points")
+        say("✗ No earnings overlap: 0 points")
     breakdown['earnings'] = earnings_check
     
     # Check 4: Economic data
-    print("\nChecking economic data:")
-    econ_data = check_economic_data_nearby(target_date, window_days=5)
+    say("\nChecking economic data:")
+    with STAGE_SECONDS.time('entry.economic'):
+        econ_data = check_economic_data_nearby(target_date, window_days=5, log=log)
     if econ_data['any']:
         score += 2
-        print("✓ Economic data nearby: +2 points")
+        say("✓ Economic data nearby: +2 points")
     else:
-        print("✗ No economic data: 0 points")
+        say("✗ No economic data: 0 points")
     breakdown['economic_data'] = econ_data['any']
     
-    print(f"\n{'='*50}")
-    print(f"TOTAL SCORE: {score}/9")
-    print(f"{'='*50}\n")
+    say(f"\n{'='*50}")
+    say(f"TOTAL SCORE: {score}/9")
+    say(f"{'='*50}\n")
     
     # Determine conviction level
     if score >= 7:
@@ -83,16 +107,198 @@ def calculate_entry_score(target_date):
     else:
         conviction = "LOW"
     
-    print(f"Conviction Level: {conviction}\n")
+    say(f"Conviction Level: {conviction}\n")
     
     return {
         'date': target_date,
         'score': score,
         'conviction': conviction,
-        'breakdown': breakdown
+        'breakdown': breakdown,
+        'earnings_releases': earnings_releases,
+        'economic_releases': econ_data['releases']
+    }
+
+
+def _vix_below_18_mask(target_days, vix_data):
+    """Vectorized is_vix_below_18: last close on or before each day < 18."""
+    close_prices = get_close_prices(vix_data).dropna()
+    vix_days = to_days(close_prices.index)
+    values = close_prices.to_numpy(dtype=np.float64)
+    
+    idx = np.searchsorted(vix_days, target_days, side='right') - 1
+    known = idx >= 0
+    below = np.zeros(len(target_days), dtype=bool)
+    below[known] = values[idx[known]] < 18
+    return below
+
+
+def score_dates(dates, tickers=DEFAULT_TICKERS, window_days=5, vix_data=None):
+    """
+    Score many dates at once. Same rules as calculate_entry_score.
+    
+    vix_data overrides the stored VIX history (e.g. a longer series
+    for backtests). Default-ticker scores come from the shared score
+    table when the app has enabled it and it covers every date.
+    
+    Returns:
+        DataFrame indexed by date with one column per breakdown key,
+        plus 'score' and 'conviction'
+    """
+    index = pd.DatetimeIndex(pd.to_datetime(dates)).normalize()
+    index.name = 'date'
+    days = to_days(index)
+    
+    # The app keeps the default scores in a shared on-disk table
+    if tickers == DEFAULT_TICKERS and window_days == 5 and vix_data is None:
+        from score_table import lookup_scores, table_to_frame
+        rows = lookup_scores(days)
+        if rows is not None:
+            return table_to_frame(rows, index)
+    
+    calendars = get_calendar_index()
+    
+    with STAGE_SECONDS.time('range.fed'):
+        fed_meeting = calendars.any_within_many('fed', days, 0)
+    
+    with STAGE_SECONDS.time('range.vix'):
+        if vix_data is None:
+            vix_low = get_vix_analytics().below_18_asof(days)
+        else:
+            vix_low = _vix_below_18_mask(days, vix_data)
+    
+    with STAGE_SECONDS.time('range.earnings'):
+        earnings = earnings_mask(days, tickers, window_days)
+    
+    # Economic data only counts releases in the target's own year
+    with STAGE_SECONDS.time('range.economic'):
+        economic_data = (calendars.any_within_many('cpi', days, window_days, same_year=True) |
+                         calendars.any_within_many('nfp', days, window_days, same_year=True))
+    
+    score = (2 * fed_meeting.astype(np.int64) +
+             2 * vix_low.astype(np.int64) +
+             3 * earnings.astype(np.int64) +
+             2 * economic_data.astype(np.int64))
+    
+    conviction = np.select([score >= 7, score >= 4], ['HIGH', 'MEDIUM'], 'LOW')
+    
+    return pd.DataFrame({
+        'fed_meeting': fed_meeting,
+        'vix_low': vix_low,
+        'earnings': earnings,
+        'economic_data': economic_data,
+        'score': score,
+        'conviction': conviction
+    }, index=index)
+
+
+def calculate_scores_range(start, end, tickers=DEFAULT_TICKERS, window_days=5, vix_data=None):
+    """
+    Score every calendar day from start to end (inclusive) in one pass.
+    
+    Example:
+        scores = calculate_scores_range('2025-01-01', '2025-12-31')
+        scores.loc['2025-07-30', 'score']
+    """
+    dates = pd.date_range(pd.to_datetime(start).normalize(),
+                          pd.to_datetime(end).normalize(), freq='D')
+    return score_dates(dates, tickers=tickers, window_days=window_days, vix_data=vix_data)
+
+
+def score_row_to_result(date, row):
+    """Turn one row of score_dates() into the calculate_entry_score dict."""
+    return {
+        'date': pd.to_datetime(date).strftime('%Y-%m-%d'),
+        'score': int(row['score']),
+        'conviction': row['conviction'],
+        'breakdown': {key: bool(row[key]) for key in BREAKDOWN_KEYS}
     }
 
 
+def _window_days(event_days, window_days, first_day, last_day):
+    """Every day within +/- window_days of an event, clipped to [first_day, last_day]."""
+    lo = np.searchsorted(event_days, first_day - window_days, side='left')
+    hi = np.searchsorted(event_days, last_day + window_days, side='right')
+    events = event_days[lo:hi]
+    days = (events[:, None] + np.arange(-window_days, window_days + 1)).ravel()
+    return days[(days >= first_day) & (days <= last_day)]
+
+
+def find_next_high_risk_day(start, threshold=7, horizon_days=30, tickers=DEFAULT_TICKERS,
+                            window_days=5, weekdays_only=True):
+    """
+    First day after start (up to horizon_days ahead) scoring >= threshold.
+    
+    Instead of scoring every day, it only looks at days near a Fed, earnings,
+    CPI or NFP event: any other day can score at most the VIX points. Each
+    candidate's catalyst points are checked against the index first, and
+    only days whose best case (catalysts + VIX) reaches the threshold get a
+    VIX lookup.
+    
+    Returns:
+        calculate_entry_score-style dict plus 'days_away', or None
+    """
+    start_day = to_days([start])[0]
+    first_day, last_day = start_day + 1, start_day + horizon_days
+    calendars = get_calendar_index()
+    earnings_index = get_earnings_index(tickers)
+    
+    if threshold <= POINTS['vix_low']:
+        # VIX alone can reach the threshold, so every day is a candidate
+        candidates = np.arange(first_day, last_day + 1)
+    else:
+        candidates = np.unique(np.concatenate([
+            _window_days(calendars.days('fed'), 0, first_day, last_day),
+            _window_days(earnings_index.days('earnings'), window_days, first_day, last_day),
+            _window_days(calendars.days('cpi'), window_days, first_day, last_day),
+            _window_days(calendars.days('nfp'), window_days, first_day, last_day),
+        ]))
+    if weekdays_only:
+        # 1970-01-01 was a Thursday
+        candidates = candidates[(candidates + 3) % 7 < 5]
+    
+    # Upper bound from the calendars alone; VIX can add at most its points
+    catalyst_points = (
+        POINTS['fed_meeting'] * calendars.any_within_many('fed', candidates, 0) +
+        POINTS['earnings'] * earnings_mask(candidates, tickers, window_days) +
+        POINTS['economic_data'] * (
+            calendars.any_within_many('cpi', candidates, window_days, same_year=True) |
+            calendars.any_within_many('nfp', candidates, window_days, same_year=True))
+    )
+    keep = catalyst_points + POINTS['vix_low'] >= threshold
+    candidates, catalyst_points = candidates[keep], catalyst_points[keep]
+    if not len(candidates):
+        return None
+    
+    # Exact scores for the survivors, in date order
+    vix_low = get_vix_analytics().below_18_asof(candidates)
+    scores = catalyst_points + POINTS['vix_low'] * vix_low
+    hits = np.flatnonzero(scores >= threshold)
+    if not len(hits):
+        return None
+    
+    day = candidates[hits[0]]
+    date = pd.Timestamp(day, unit='D')
+    scored = score_dates([date], tickers=tickers, window_days=window_days)
+    result = score_row_to_result(date, scored.iloc[0])
+    result['days_away'] = int(day - start_day)
+    return result
+
+
+def warm_up(tickers=DEFAULT_TICKERS):
+    """
+    Load everything scoring needs up front: the VIX history and its
+    analytics, the earnings calendars and the event calendars. Importing
+    this module does no I/O, so long-running processes (the web server)
+    call this once at startup to keep that cost out of the first request.
+    """
+    get_vix_analytics()
+    get_calendar_index()
+    get_earnings_index(tickers)
+    if tickers == DEFAULT_TICKERS and DEFAULT_WEIGHTS:
+        # The scorers weight the default universe by market cap
+        get_earnings_index(tickers, DEFAULT_WEIGHTS)
+
+
 # Test it
 if __name__ == "__main__":
     print("="*60)
@@ -101,15 +307,15 @@ if __name__ == "__main__":
     
     # Test 1: July 31, 2024 - your best backtest trade (+33.99%)
     print("\n\nTEST 1: July 31, 2024 (Best backtest trade)")
-    result1 = calculate_entry_score('2024-07-31')
+    result1 = calculate_entry_score('2024-07-31', log=print)
     
     # Test 2: Today's 50% winner
     print("\n\nTEST 2: Nov 17, 2025 (Today's 50% win)")
-    result2 = calculate_entry_score('2025-11-17')
+    result2 = calculate_entry_score('2025-11-17', log=print)
     
     # Test 3: Nov 7, 2024 - Fed meeting that lost (-17.81%)
     print("\n\nTEST 3: Nov 7, 2024 (Fed meeting - lost 17.81%)")
-    result3 = calculate_entry_score('2024-11-07')
+    result3 = calculate_entry_score('2024-11-07', log=print)
     
     # Summary
     print("\n\n" + "="*60)
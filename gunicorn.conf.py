@@ -0,0 +1,18 @@
+"""
+gunicorn settings: gunicorn -c gunicorn.conf.py app:app
+
+Each worker warms its stores and starts its background refresh after the
+fork. The first worker to start becomes the score table writer; the
+others memory-map its file.
+"""
+import os
+
+bind = os.environ.get('VOLATILITY_BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('VOLATILITY_WORKERS', 4))
+# /stream keeps connections open, so give each worker threads to serve them
+threads = int(os.environ.get('VOLATILITY_THREADS', 8))
+
+
+def post_fork(server, worker):
+    import app
+    app.start_worker()
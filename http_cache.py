@@ -0,0 +1,152 @@
+"""
+Conditional requests, Cache-Control and compression for Flask responses.
+
+Pages and API answers only change when the dashboard snapshot (or the
+data behind a query) does, so each gets a strong ETag and a matching
+If-None-Match is answered with 304 before any work is done. Lifetimes
+follow the market: short while it is open, longer once it has closed.
+Bodies are gzip compressed, or brotli when the brotli module is
+installed and the client prefers it.
+"""
+import functools
+import gzip
+import zlib
+from datetime import datetime
+
+from flask import Response, make_response, request
+
+from scheduler import MARKET_OPEN, MARKET_CLOSE, MARKET_TZ, next_market_event
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Seconds clients and proxies may reuse a response
+OPEN_MAX_AGE = 60
+CLOSED_MAX_AGE = 3600
+
+COMPRESSIBLE = {'text/html', 'text/plain', 'text/css', 'application/json',
+                'application/x-ndjson', 'application/javascript'}
+MIN_COMPRESS_SIZE = 500
+
+ENCODING_SUFFIX = {'gzip': '-gz', 'br': '-br'}
+
+
+def market_is_open(now=None):
+    now = now or datetime.now(MARKET_TZ)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def max_age(now=None):
+    """
+    Cache lifetime for data that changes with the market: OPEN_MAX_AGE
+    during the session, otherwise up to CLOSED_MAX_AGE but never past the
+    next open, close or midnight.
+    """
+    now = now or datetime.now(MARKET_TZ)
+    if market_is_open(now):
+        return OPEN_MAX_AGE
+    until_next = int((next_market_event(now) - now).total_seconds())
+    return max(0, min(CLOSED_MAX_AGE, until_next))
+
+
+def cache_control(now=None):
+    return f"public, max-age={max_age(now)}"
+
+
+def matches(etag):
+    """The form of this ETag (plain or per encoding) If-None-Match names, or None."""
+    for candidate in [etag] + [etag + suffix for suffix in ENCODING_SUFFIX.values()]:
+        if request.if_none_match.contains(candidate):
+            return candidate
+    return None
+
+
+def not_modified(etag):
+    """Empty 304 carrying the same validators and lifetime as a full answer."""
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control()
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def conditional(etag_func, last_modified_func=None):
+    """
+    Decorate a view whose output is fixed by etag_func(). A matching
+    If-None-Match gets a 304 without calling the view.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = etag_func()
+            matched = matches(etag)
+            if matched:
+                return not_modified(matched)
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = cache_control()
+                if last_modified_func is not None and last_modified_func():
+                    response.last_modified = last_modified_func()
+            return response
+        return wrapper
+    return decorator
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br'] and accepted['br'] >= accepted['gzip']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress_stream(chunks, encoding):
+    if encoding == 'br':
+        compressor = brotli.Compressor()
+        for chunk in chunks:
+            data = compressor.process(chunk.encode() if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: gzip container
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def compress(response):
+    """after_request hook: compress text bodies the client accepts compressed."""
+    if (response.status_code != 200 or response.direct_passthrough or
+            'Content-Encoding' in response.headers or
+            response.mimetype not in COMPRESSIBLE):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+    
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return response
+        if encoding == 'br':
+            response.set_data(brotli.compress(data, quality=5))
+        else:
+            response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = encoding
+    
+    # The compressed body is a different representation, so it gets its own strong ETag
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag + ENCODING_SUFFIX[encoding])
+    return response
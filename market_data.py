@@ -0,0 +1,316 @@
+"""
+Market data providers. Every vendor request in the app goes through here.
+
+get_provider() returns the process-wide MarketDataProvider, chosen by
+environment variables:
+    
+    MARKET_DATA_PROVIDER   yfinance (default) or file
+    MARKET_DATA_MODE       live (default), record or replay
+    MARKET_DATA_FIXTURES   directory for the file provider and recordings
+                           (default: benchmarks/fixtures)
+    MARKET_DATA_TIMEOUT    seconds per vendor request (default 10)
+    MARKET_DATA_BUDGET     hard limit in seconds for one provider call,
+                           retries included (default 5)
+    MARKET_DATA_BREAKER_FAILURES / MARKET_DATA_BREAKER_COOLDOWN
+                           failures in a row that stop calls to the
+                           provider, and for how many seconds (3, 60)
+
+record wraps the yfinance provider and saves every response as a file;
+replay is the same as MARKET_DATA_PROVIDER=file and never touches the
+network. Calls that fail or overrun their budget count toward the
+circuit breaker of their endpoint (history or earnings_dates); while it
+is open they raise CircuitOpenError at once and the stores keep serving
+their last good data. An earnings lookup the vendor has no usable data
+for (ValueError, LookupError) fails on its own without counting: the
+earnings store already backs off that one ticker, and one bad symbol in
+a universe ingest must not cut off the rest. (A history download comes
+back empty for every symbol when Yahoo is throttling, so those errors
+still count.) Files use this layout:
+    
+    history/<SYMBOL>.csv     daily closes (date, close)
+    earnings/<TICKER>.json   list of 'YYYY-MM-DD' earnings dates
+"""
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+
+import pandas as pd
+
+from metrics import PROVIDER_ERRORS, PROVIDER_REJECTED, PROVIDER_SECONDS
+from resilience import CircuitOpenError, call_with_timeout, get_breaker
+
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   'benchmarks', 'fixtures')
+DEFAULT_TIMEOUT = 10
+DEFAULT_BUDGET = 5
+
+# The vendor answered but had nothing usable for the symbol(s) asked for.
+# These say nothing about the endpoint's health, so they skip the breaker.
+SYMBOL_ERRORS = (ValueError, LookupError)
+
+# Number of provider calls per function, for benchmarks
+CALL_COUNTS = Counter()
+_counts_lock = threading.Lock()
+
+
+def _count(name):
+    with _counts_lock:
+        CALL_COUNTS[name] += 1
+
+
+def _period_start(end, period):
+    """Start date for a yfinance-style period ('5d', '1mo', '2y') ending at end."""
+    if period.endswith('mo'):
+        return end - pd.DateOffset(months=int(period[:-2]))
+    number, unit = int(period[:-1]), period[-1]
+    if unit == 'd':
+        return end - pd.DateOffset(days=number)
+    if unit == 'y':
+        return end - pd.DateOffset(years=number)
+    raise ValueError(f"Unsupported period {period!r}")
+
+
+def _yf():
+    """yfinance, imported on first use so offline runs never load it."""
+    import yfinance
+    return yfinance
+
+
+class MarketDataProvider(ABC):
+    """
+    Source of daily closes and earnings calendars.
+    
+    Implementations raise on failure rather than returning empty data,
+    so callers can keep their last good copy.
+    """
+    
+    @abstractmethod
+    def history(self, symbols, start=None, period=None):
+        """
+        Daily closes for one or more symbols in a single request.
+        Pass either start ('YYYY-MM-DD') or period ('5d', '2y', ...).
+        
+        Returns:
+            DataFrame indexed by date with one column per symbol
+        """
+    
+    @abstractmethod
+    def earnings_dates(self, ticker):
+        """Every known earnings date for a ticker ('YYYY-MM-DD' strings)."""
+
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    Yahoo Finance via yfinance, sharing one pooled HTTP session.
+    
+    The session (curl_cffi, which yfinance uses itself) keeps connections
+    alive across calls and threads, and every request has a timeout.
+    Several symbols are fetched in one download call.
+    """
+    
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._session = None
+        self._session_lock = threading.Lock()
+    
+    @property
+    def session(self):
+        with self._session_lock:
+            if self._session is None:
+                try:
+                    from curl_cffi import requests as curl_requests
+                except ImportError:
+                    # Older yfinance: let it manage its own session
+                    return None
+                self._session = curl_requests.Session(impersonate='chrome', timeout=self.timeout)
+            return self._session
+    
+    def history(self, symbols, start=None, period=None):
+        symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+        kwargs = {'start': start} if start is not None else {'period': period}
+        data = _yf().download(symbols, progress=False, timeout=self.timeout,
+                                 session=self.session, **kwargs)
+        if data is None or data.empty:
+            raise ValueError(f"No price data returned for {', '.join(symbols)}")
+        
+        closes = data['Close']
+        # Handle both single and multi-index columns
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(symbols[0])
+        closes = closes[symbols]
+        closes.index = pd.DatetimeIndex(closes.index).tz_localize(None).normalize()
+        return closes
+    
+    def earnings_dates(self, ticker):
+        stock = _yf().Ticker(ticker, session=self.session)
+        earnings_dates = stock.earnings_dates
+        if earnings_dates is not None and not earnings_dates.empty:
+            return [d.strftime('%Y-%m-%d') for d in earnings_dates.index]
+        return []
+
+
+class FileProvider(MarketDataProvider):
+    """
+    Local stand-in that answers from files (see the module docstring for
+    the layout). Used for replaying recordings and for offline runs.
+    """
+    
+    def __init__(self, directory):
+        self.directory = directory
+    
+    def _path(self, kind, name, ext):
+        safe = name.replace('^', '').replace('/', '_')
+        return os.path.join(self.directory, kind, f'{safe}.{ext}')
+    
+    def read_closes(self, symbol):
+        path = self._path('history', symbol, 'csv')
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No recorded history for {symbol} at {path}")
+        closes = pd.read_csv(path, index_col='date', parse_dates=['date'])['close']
+        closes.index = pd.DatetimeIndex(closes.index)
+        return closes
+    
+    def history(self, symbols, start=None, period=None):
+        symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+        closes = pd.concat({symbol: self.read_closes(symbol) for symbol in symbols}, axis=1)
+        if start is not None:
+            closes = closes[closes.index >= pd.to_datetime(start)]
+        elif period is not None and len(closes):
+            closes = closes[closes.index > _period_start(closes.index[-1], period)]
+        if closes.empty:
+            raise ValueError(f"No recorded price data for {', '.join(symbols)} from {start or period}")
+        return closes
+    
+    def earnings_dates(self, ticker):
+        path = self._path('earnings', ticker, 'json')
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No recorded earnings for {ticker} at {path}")
+        with open(path) as f:
+            return json.load(f)
+
+
+class RecordingProvider(FileProvider):
+    """Passes calls to another provider and saves every response as a file."""
+    
+    def __init__(self, provider, directory):
+        super().__init__(directory)
+        self.provider = provider
+        self._lock = threading.Lock()
+    
+    def history(self, symbols, start=None, period=None):
+        closes = self.provider.history(symbols, start=start, period=period)
+        with self._lock:
+            for symbol in closes.columns:
+                series = closes[symbol].dropna()
+                path = self._path('history', symbol, 'csv')
+                if os.path.exists(path):
+                    # Later recordings win for overlapping days
+                    old = self.read_closes(symbol)
+                    series = pd.concat([old[~old.index.isin(series.index)], series]).sort_index()
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                series.rename('close').rename_axis('date').to_csv(path)
+        return closes
+    
+    def earnings_dates(self, ticker):
+        dates = self.provider.earnings_dates(ticker)
+        path = self._path('earnings', ticker, 'json')
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(sorted(dates), f, indent=1)
+        return dates
+
+
+def create_provider():
+    """Build the provider described by the MARKET_DATA_* environment variables."""
+    mode = os.environ.get('MARKET_DATA_MODE', 'live')
+    name = os.environ.get('MARKET_DATA_PROVIDER', 'yfinance')
+    directory = os.environ.get('MARKET_DATA_FIXTURES', DEFAULT_FIXTURE_DIR)
+    timeout = float(os.environ.get('MARKET_DATA_TIMEOUT', DEFAULT_TIMEOUT))
+    
+    if mode not in ('live', 'record', 'replay'):
+        raise ValueError(f"MARKET_DATA_MODE must be live, record or replay, not {mode!r}")
+    if name not in ('yfinance', 'file'):
+        raise ValueError(f"MARKET_DATA_PROVIDER must be yfinance or file, not {name!r}")
+    
+    if mode == 'replay' or name == 'file':
+        return FileProvider(directory)
+    if mode == 'record':
+        return RecordingProvider(YFinanceProvider(timeout=timeout), directory)
+    return YFinanceProvider(timeout=timeout)
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """Process-wide provider, created on first use."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = create_provider()
+        return _provider
+
+
+def set_provider(provider):
+    """Swap the process-wide provider (e.g. a custom data source)."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
+
+
+def get_fixture_dir():
+    """Directory the file provider reads and recordings are written to."""
+    return os.environ.get('MARKET_DATA_FIXTURES', DEFAULT_FIXTURE_DIR)
+
+
+def _guarded(call, func, *args, symbol_errors=(), **kwargs):
+    """
+    Run one provider call within MARKET_DATA_BUDGET and behind the call's
+    circuit breaker, recording latency, errors and rejections.
+    Errors of a type in symbol_errors are recorded but leave the breaker closed.
+    """
+    breaker = get_breaker(call,
+                          failure_threshold=int(os.environ.get('MARKET_DATA_BREAKER_FAILURES', 3)),
+                          cooldown=float(os.environ.get('MARKET_DATA_BREAKER_COOLDOWN', 60)))
+    try:
+        breaker.before_call()
+    except CircuitOpenError:
+        PROVIDER_REJECTED.inc(call)
+        raise
+    budget = float(os.environ.get('MARKET_DATA_BUDGET', DEFAULT_BUDGET))
+    try:
+        with PROVIDER_SECONDS.time(call):
+            result = call_with_timeout(func, budget, *args, **kwargs)
+    except symbol_errors:
+        # The endpoint responded, which also settles a half-open trial
+        breaker.record_success()
+        PROVIDER_ERRORS.inc(call)
+        raise
+    except Exception as e:
+        breaker.record_failure(e)
+        PROVIDER_ERRORS.inc(call)
+        raise
+    breaker.record_success()
+    return result
+
+
+def download_histories(symbols, start=None, period=None):
+    """Daily closes for several symbols in one request (DataFrame, one column each)."""
+    _count('download_history')
+    return _guarded('history', get_provider().history, symbols, start=start, period=period)
+
+
+def download_history(symbol, start=None, period=None):
+    """Daily closes for one symbol as a Series indexed by date. Raises on failure."""
+    return download_histories([symbol], start=start, period=period)[symbol].dropna()
+
+
+def fetch_earnings_dates(ticker):
+    """Every known earnings date for a ticker ('YYYY-MM-DD' strings). Raises on failure."""
+    _count('fetch_earnings_dates')
+    return _guarded('earnings_dates', get_provider().earnings_dates, ticker,
+                    symbol_errors=SYMBOL_ERRORS)
@@ -0,0 +1,285 @@
+"""
+On-demand profiling for CLI runs and web requests.
+
+Two kinds of profile:
+    cprofile  deterministic, every call timed (cProfile). Written as a
+              .pstats file for pstats, snakeviz or gprof2dot.
+    sample    a thread samples every thread's stack each SAMPLE_INTERVAL
+              seconds, so vendor calls on the deadline and earnings-fetch
+              pools show up under their own thread. Cheaper on call-heavy
+              code, and written as collapsed stacks (.folded), the input
+              format of flamegraph.pl and speedscope.
+
+cProfile only sees the thread that started it, so while a cprofile
+profile is running, vendor calls and earnings fetches made from that
+thread run on it directly (resilience.run_inline) instead of on their
+worker pools, without their time budget. Either way the top hotspots
+are printed to stderr.
+
+    python daily_volatility_score.py --profile            # cProfile
+    python daily_volatility_score.py --start 2024-01-01 --end 2024-12-31 --profile sample
+
+The web app only installs its hooks when VOLATILITY_PROFILING=1. A
+request then opts in with ?profile=1 (or ?profile=sample) or an
+X-Profile header, and its profile lands in data/profiles. Without the
+variable nothing is registered, so requests pay nothing. One request is
+profiled at a time (cProfile is process-wide on Python 3.12+); a profile
+request that arrives while another is running gets a 409.
+"""
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from resilience import run_inline
+from storage import data_path
+
+KINDS = ('cprofile', 'sample')
+EXTENSIONS = {'cprofile': '.pstats', 'sample': '.folded'}
+
+# Seconds between stack samples
+SAMPLE_INTERVAL = 0.005
+# Hotspots printed per section
+TOP = 15
+
+# Leaf frames of threads that are just waiting for work; their samples are dropped
+IDLE_FRAMES = {'threading:wait', 'threading:_wait_for_tstate_lock',
+               'concurrent.futures.thread:_worker', 'queue:get', 'selectors:select',
+               'socketserver:serve_forever', 'profiling:_run'}
+
+# Held while a request is being profiled
+_request_lock = threading.Lock()
+
+
+def profile_dir():
+    """data/profiles, created on first use."""
+    path = data_path('profiles')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def default_path(name, kind):
+    """data/profiles/<name>-<timestamp><ext>."""
+    stamp = time.strftime('%Y%m%d-%H%M%S') + f'-{int(time.time() * 1000) % 1000:03d}'
+    safe = re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_') or 'profile'
+    return os.path.join(profile_dir(), f'{safe}-{stamp}{EXTENSIONS[kind]}')
+
+
+def _frame_label(code, module):
+    return f"{module or os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _thread_label(name):
+    # Pool threads are numbered (deadline_3); fold them into one root
+    return 'thread:' + re.sub(r'_\d+$', '', name)
+
+
+class StackSampler:
+    """
+    Collapsed-stack sampler. Stacks are rooted at their thread's name.
+    The thread that calls start() is always sampled; other threads only
+    while they are doing something (not parked in IDLE_FRAMES).
+    """
+    
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._thread_id = None
+        self._stop = threading.Event()
+        self._sampler = None
+    
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._sampler.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+    
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code, frame.f_globals.get('__name__')))
+                    frame = frame.f_back
+                if ident != self._thread_id and (not labels or labels[0] in IDLE_FRAMES):
+                    continue
+                labels.append(_thread_label(names.get(ident, str(ident))))
+                # Root first, as flamegraph tools expect
+                self.stacks[';'.join(reversed(labels))] += 1
+            self.samples += 1
+    
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+    
+    def hotspots(self, limit=TOP):
+        """Functions by share of samples they appear in (total) and are on top of (self)."""
+        total = Counter()
+        own = Counter()
+        for stack, count in self.stacks.items():
+            labels = stack.split(';')
+            own[labels[-1]] += count
+            for label in set(labels):
+                total[label] += count
+        samples = max(self.samples, 1)
+        # Busy threads are counted side by side, so shares can add up past 100%
+        lines = [f"{self.samples} samples every {self.interval * 1000:g} ms, all busy threads",
+                 f"{'total':>7} {'self':>7}  function"]
+        for label, count in total.most_common(limit):
+            lines.append(f"{count / samples:7.1%} {own[label] / samples:7.1%}  {label}")
+        lines.append("")
+        lines.append("Most time on top of the stack:")
+        for label, count in own.most_common(limit):
+            lines.append(f"{count / samples:7.1%}  {label}")
+        return '\n'.join(lines)
+
+
+class Profiler:
+    """
+    Profile a block of code on the current thread:
+        
+        with Profiler('sample') as profiler:
+            work()
+        path = profiler.save('work')
+        print(profiler.hotspots())
+    """
+    
+    def __init__(self, kind='cprofile'):
+        if kind not in KINDS:
+            raise ValueError(f"Profile kind must be one of {', '.join(KINDS)}, not {kind!r}")
+        self.kind = kind
+        self.elapsed = None
+        self._profile = cProfile.Profile() if kind == 'cprofile' else StackSampler()
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+    
+    def start(self):
+        self._started = time.perf_counter()
+        if self.kind == 'cprofile':
+            run_inline(True)
+            self._profile.enable()
+        else:
+            self._profile.start()
+    
+    def stop(self):
+        if self.kind == 'cprofile':
+            self._profile.disable()
+            run_inline(False)
+        else:
+            self._profile.stop()
+        self.elapsed = time.perf_counter() - self._started
+    
+    def save(self, name, path=None):
+        """Write the profile (to data/profiles unless path is given). Returns the path."""
+        path = path or default_path(name, self.kind)
+        if self.kind == 'cprofile':
+            self._profile.dump_stats(path)
+        else:
+            self._profile.write(path)
+        return path
+    
+    def hotspots(self, limit=TOP):
+        """Printable summary of where the time went."""
+        if self.kind == 'sample':
+            return self._profile.hotspots(limit)
+        lines = []
+        for sort, title in (('cumulative', 'Cumulative time (function and its callees):'),
+                            ('tottime', 'Own time (inside the function itself):')):
+            out = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=out)
+            stats.strip_dirs().sort_stats(sort).print_stats(limit)
+            # Drop pstats' preamble; keep the table
+            table = out.getvalue()
+            table = table[table.find('   ncalls'):].rstrip()
+            lines += [title, table, ""]
+        return '\n'.join(lines).rstrip()
+    
+    def report(self, name, path=None, stream=None):
+        """save() then print a summary with the file's location. Returns the path."""
+        path = self.save(name, path)
+        stream = stream or sys.stderr
+        print(f"\n{self.kind} profile of {name}: {self.elapsed:.3f}s, written to {path}", file=stream)
+        print(self.hotspots(), file=stream)
+        return path
+
+
+def enabled():
+    """VOLATILITY_PROFILING=1 turns on per-request profiling in the web app."""
+    return os.environ.get('VOLATILITY_PROFILING', '') not in ('', '0')
+
+
+def requested_kind(request):
+    """Profile kind a request asked for via ?profile= or X-Profile, or None."""
+    value = request.args.get('profile') or request.headers.get('X-Profile')
+    if not value or value in ('0', 'false'):
+        return None
+    return value if value in KINDS else 'cprofile'
+
+
+def install(app):
+    """
+    Profile requests that ask for it. Does nothing unless profiling is
+    enabled(), so normal deployments do not even get the hooks.
+    
+    Streamed responses (/api/scores, /stream) are profiled up to the
+    point the view returns, not while the body is sent.
+    """
+    if not enabled():
+        return False
+    from flask import g, jsonify, request
+    
+    @app.before_request
+    def start_profile():
+        kind = requested_kind(request)
+        if not kind:
+            return None
+        if not _request_lock.acquire(blocking=False):
+            return jsonify({'error': 'Another request is being profiled, try again shortly'}), 409
+        g.profiler = Profiler(kind)
+        g.profiler.start()
+        return None
+    
+    def stop_profile():
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.stop()
+            _request_lock.release()
+        return profiler
+    
+    @app.after_request
+    def finish_profile(response):
+        profiler = stop_profile()
+        if profiler is not None:
+            path = profiler.report(f"{request.method}-{request.endpoint or 'unknown'}")
+            response.headers['X-Profile-File'] = os.path.basename(path)
+        return response
+    
+    @app.teardown_request
+    def drop_profile(exc):
+        # A request that failed before after_request must not leave its profiler running
+        stop_profile()
+    
+    return True
@@ -0,0 +1,163 @@
+"""
+Time budgets and circuit breakers for calls to outside services.
+
+call_with_timeout() gives a call a hard deadline: it runs on a worker
+thread and the caller stops waiting once the budget is spent, even if
+the library underneath ignores its own timeout. A CircuitBreaker stops
+calling a source after repeated failures and lets a single trial call
+through once its cool-down has passed, so a degraded vendor costs one
+fast CircuitOpenError per request instead of a full timeout.
+
+Callers are expected to fall back to the last data they got.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+# Threads for deadline-bound calls. A call that overruns keeps its thread
+# until it returns on its own, so this also caps how many can pile up.
+MAX_CALL_WORKERS = 16
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN = 60.0
+
+
+class CallTimeout(TimeoutError):
+    """A call did not finish within its budget."""
+
+
+class CircuitOpenError(RuntimeError):
+    """A call was skipped because its circuit breaker is open."""
+
+
+_executor = None
+_executor_lock = threading.Lock()
+# Per-thread switch set by run_inline()
+_inline = threading.local()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_CALL_WORKERS,
+                                           thread_name_prefix='deadline')
+        return _executor
+
+
+def run_inline(enabled):
+    """
+    While enabled, deadline-bound calls made from this thread run on it
+    directly, without a deadline. The profiler turns this on so cProfile,
+    which only sees its own thread, records the vendor calls themselves.
+    """
+    _inline.enabled = enabled
+
+
+def runs_inline():
+    """Has run_inline() been switched on for this thread?"""
+    return getattr(_inline, 'enabled', False)
+
+
+def call_with_timeout(func, timeout, *args, **kwargs):
+    """
+    func(*args, **kwargs), raising CallTimeout after `timeout` seconds.
+    With timeout None (or under run_inline()) the call runs on the caller's thread.
+    """
+    if timeout is None or runs_inline():
+        return func(*args, **kwargs)
+    future = _get_executor().submit(func, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        future.cancel()
+        raise CallTimeout(f"{getattr(func, '__name__', 'call')} took longer than {timeout:g}s") from None
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. After `failure_threshold` failures in a row
+    it opens and rejects calls for `cooldown` seconds. Then it is half
+    open: one trial call goes through, and its result closes the breaker
+    or opens it for another cool-down.
+    """
+    
+    def __init__(self, name, failure_threshold=DEFAULT_FAILURE_THRESHOLD, cooldown=DEFAULT_COOLDOWN):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self.last_error = None
+    
+    @property
+    def state(self):
+        """'closed', 'open' or 'half_open'."""
+        with self._lock:
+            return self._state()
+    
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at < self.cooldown:
+            return 'open'
+        return 'half_open'
+    
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return
+            if state == 'half_open' and not self._trial:
+                self._trial = True
+                return
+            raise CircuitOpenError(f"{self.name} is unavailable (last error: {self.last_error})")
+    
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+            self.last_error = None
+    
+    def record_failure(self, error=None):
+        with self._lock:
+            self._failures += 1
+            self.last_error = error
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+    
+    def call(self, func, *args, timeout=None, **kwargs):
+        """func(*args, **kwargs) through the breaker, within an optional time budget."""
+        self.before_call()
+        try:
+            result = call_with_timeout(func, timeout, *args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name, **kwargs):
+    """Process-wide breaker for a named source, created on first use with kwargs."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **kwargs)
+        return breaker
+
+
+def breaker_states():
+    """{name: state} for every breaker created so far."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.state for breaker in breakers}
@@ -0,0 +1,99 @@
+import logging
+import threading
+from datetime import datetime, time as dt_time, timedelta
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+MARKET_TZ = ZoneInfo('America/New_York')
+MARKET_OPEN = dt_time(9, 30)
+MARKET_CLOSE = dt_time(16, 0)
+
+# Refresh at least this often even when no market event is due
+DEFAULT_INTERVAL = 15 * 60
+
+
+def next_market_event(now=None):
+    """
+    Next market open, market close or midnight (new trading date), in
+    New York time. Weekends only get the midnight rollover.
+    """
+    now = now or datetime.now(MARKET_TZ)
+    candidates = []
+    for offset in range(0, 4):
+        day = (now + timedelta(days=offset)).date()
+        times = [dt_time(0, 0)]
+        if day.weekday() < 5:
+            times += [MARKET_OPEN, MARKET_CLOSE]
+        for t in times:
+            at = datetime.combine(day, t, tzinfo=MARKET_TZ)
+            if at > now:
+                candidates.append(at)
+    return min(candidates)
+
+
+class RefreshScheduler:
+    """
+    Background thread that keeps precomputed results current.
+    
+    Calls `refresh(force)` once at start, then every `interval` seconds
+    and right after each market open, market close and midnight. force is
+    True for those market events so data is re-pulled even if it was
+    checked recently. Request handlers never wait on it: they keep reading
+    the previous results until a refresh finishes.
+    """
+    
+    def __init__(self, refresh, interval=DEFAULT_INTERVAL):
+        """
+        Args:
+            refresh: Callable (force) -> None that updates data and rebuilds results
+            interval: Seconds between routine refreshes
+        """
+        self.refresh = refresh
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run = None
+    
+    def start(self):
+        """Start the background thread (no-op if it is already running)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='refresh-scheduler', daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+    
+    def trigger(self):
+        """Ask for a refresh now instead of waiting for the next slot."""
+        self._wake.set()
+    
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+    
+    def _run_once(self, force):
+        try:
+            self.refresh(force)
+        except Exception:
+            logger.exception("Background refresh failed")
+        self.last_run = datetime.now(MARKET_TZ)
+    
+    def _run(self):
+        self._run_once(force=False)
+        while not self._stop.is_set():
+            now = datetime.now(MARKET_TZ)
+            event = next_market_event(now)
+            timeout = min(self.interval, (event - now).total_seconds())
+            triggered = self._wake.wait(max(timeout, 0))
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            force = not triggered and datetime.now(MARKET_TZ) >= event
+            self._run_once(force)
@@ -0,0 +1,424 @@
+"""
+Precomputed daily score table shared by every app process.
+
+One row per calendar day in a plain .npy file:
+    
+    day    int32    days since 1970-01-01
+    mask   uint8    catalyst bits, one per BREAKDOWN_KEYS entry
+    score  uint8
+    vix    float32  last VIX close on or before the day (NaN if none)
+
+Readers memory-map the file read-only, so N workers share one copy in
+the page cache instead of each scoring the same dates. One process (the
+holder of scores.lock) is the writer: when its data changes it rescores
+the affected days and swaps the table in with an atomic rename. Readers
+notice the new file on their next lookup.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from below18 import get_close_prices, get_vix_history, get_vix_store
+from calendars import get_calendars
+from earnings import get_earnings_store, DEFAULT_TICKERS
+from entry_score import score_dates, BREAKDOWN_KEYS
+from catalyst_index import to_days, from_day
+from metrics import STAGE_SECONDS, TABLE_ROWS
+from storage import connect, data_path
+from vix_store import HISTORY_YEARS
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, every process writes its own table
+    fcntl = None
+
+DTYPE = np.dtype([('day', '<i4'), ('mask', 'u1'), ('score', 'u1'), ('vix', '<f4')])
+
+BITS = {key: 1 << i for i, key in enumerate(BREAKDOWN_KEYS)}
+
+# Years of history kept before the current year (the table also covers next
+# year); the VIX store backfills the same span (SCORE_TABLE_YEARS)
+DEFAULT_YEARS = HISTORY_YEARS
+
+# Earnings window the table is scored with (score_dates' default)
+WINDOW_DAYS = 5
+
+TABLE_FILE = 'scores.npy'
+LOCK_FILE = 'scores.lock'
+CHANGE_LOG_FILE = 'score_changes.sqlite'
+
+
+def table_range(now=None, years=DEFAULT_YEARS):
+    """First and last date the table covers: Jan 1 `years` back to Dec 31 next year."""
+    now = now or datetime.now()
+    return pd.Timestamp(now.year - years, 1, 1), pd.Timestamp(now.year + 1, 12, 31)
+
+
+def build_rows(days, vix_data):
+    """Score the given day numbers into a DTYPE array (same order)."""
+    dates = pd.to_datetime(np.asarray(days, dtype=np.int64), unit='D')
+    scores = score_dates(dates, window_days=WINDOW_DAYS, vix_data=vix_data)
+    
+    rows = np.zeros(len(dates), dtype=DTYPE)
+    rows['day'] = days
+    for key, bit in BITS.items():
+        rows['mask'] |= np.where(scores[key].to_numpy(), bit, 0).astype(np.uint8)
+    rows['score'] = scores['score'].to_numpy()
+    
+    closes = get_close_prices(vix_data).dropna()
+    vix_days = to_days(closes.index)
+    idx = np.searchsorted(vix_days, rows['day'], side='right') - 1
+    rows['vix'] = np.where(idx >= 0, closes.to_numpy(dtype=np.float32)[np.maximum(idx, 0)], np.nan)
+    return rows
+
+
+def build_table(start, end, vix_data=None):
+    """Score every day from start to end into a DTYPE array."""
+    if vix_data is None:
+        vix_data = get_vix_history()
+    return build_rows(to_days(pd.date_range(start, end, freq='D')), vix_data)
+
+
+def vix_affected_days(old_vix, new_vix, first_day, last_day):
+    """
+    Days whose "last close on or before" lookup differs between two VIX
+    histories.
+    
+    A bar that was added, removed or revised at day b is what every day
+    from b up to the next bar sees, so only that stretch is affected
+    (through last_day for the newest bar).
+    """
+    old = get_close_prices(old_vix).dropna()
+    new = get_close_prices(new_vix).dropna()
+    old_days, new_days = to_days(old.index), to_days(new.index)
+    bars = np.union1d(old_days, new_days)
+    
+    old_close = pd.Series(old.to_numpy(), index=old_days).reindex(bars).to_numpy()
+    new_close = pd.Series(new.to_numpy(), index=new_days).reindex(bars).to_numpy()
+    changed = ~((old_close == new_close) | (np.isnan(old_close) & np.isnan(new_close)))
+    
+    positions = np.flatnonzero(changed)
+    next_bar = np.append(bars[1:], last_day + 1)
+    return _day_ranges(bars[positions], next_bar[positions] - 1, first_day, last_day)
+
+
+def earnings_affected_days(old_calendar, new_calendar, window_days, first_day, last_day):
+    """
+    Days within window_days of an earnings date that was added or removed,
+    per ticker: {ticker: day numbers}. Tickers whose dates did not change
+    are left out.
+    """
+    affected = {}
+    for ticker in set(old_calendar) | set(new_calendar):
+        moved = set(old_calendar.get(ticker, ())) ^ set(new_calendar.get(ticker, ()))
+        if not moved:
+            continue
+        moved_days = to_days(sorted(moved))
+        days = _day_ranges(moved_days - window_days, moved_days + window_days, first_day, last_day)
+        if len(days):
+            affected[ticker] = days
+    return affected
+
+
+def _day_ranges(starts, ends, first_day, last_day):
+    """Unique day numbers covered by [start, end] ranges, clipped to the table."""
+    starts = np.maximum(np.asarray(starts, dtype=np.int64), first_day)
+    ends = np.minimum(np.asarray(ends, dtype=np.int64), last_day)
+    keep = ends >= starts
+    if not keep.any():
+        return np.array([], dtype=np.int64)
+    return np.unique(np.concatenate([np.arange(a, b + 1) for a, b in zip(starts[keep], ends[keep])]))
+
+
+class ChangeLog:
+    """Dates whose score or catalysts changed on a table update (data/score_changes.sqlite)."""
+    
+    def __init__(self, path=None):
+        self.path = path or data_path(CHANGE_LOG_FILE)
+    
+    def _connect(self):
+        conn = connect(self.path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS score_changes (
+                changed_at REAL NOT NULL,
+                day INTEGER NOT NULL,
+                old_score INTEGER NOT NULL,
+                new_score INTEGER NOT NULL,
+                old_mask INTEGER NOT NULL,
+                new_mask INTEGER NOT NULL,
+                cause TEXT NOT NULL
+            )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS score_changes_at ON score_changes (changed_at)")
+        return conn
+    
+    def append(self, old_rows, new_rows, causes):
+        """Record the rows that differ. causes: {cause: day numbers}. Returns the count."""
+        flipped = (old_rows['score'] != new_rows['score']) | (old_rows['mask'] != new_rows['mask'])
+        if not flipped.any():
+            return 0
+        old_rows, new_rows = old_rows[flipped], new_rows[flipped]
+        labels = [[] for _ in range(len(new_rows))]
+        for cause, days in causes.items():
+            for i in np.flatnonzero(np.isin(new_rows['day'], days)):
+                labels[i].append(cause)
+        
+        changed_at = time.time()
+        records = [(changed_at, int(new['day']), int(old['score']), int(new['score']),
+                    int(old['mask']), int(new['mask']), ','.join(label))
+                   for old, new, label in zip(old_rows, new_rows, labels)]
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany("INSERT INTO score_changes VALUES (?, ?, ?, ?, ?, ?, ?)", records)
+        finally:
+            conn.close()
+        return len(records)
+    
+    def recent(self, limit=50):
+        """Latest changes, newest first, as dicts."""
+        conn = self._connect()
+        try:
+            rows = conn.execute("""
+                SELECT changed_at, day, old_score, new_score, old_mask, new_mask, cause
+                FROM score_changes ORDER BY changed_at DESC, day LIMIT ?""", (limit,)).fetchall()
+        finally:
+            conn.close()
+        return [{
+            'changed_at': changed_at,
+            'date': from_day(day),
+            'old_score': old_score,
+            'new_score': new_score,
+            'flipped': [key for key, bit in BITS.items() if (old_mask ^ new_mask) & bit],
+            'cause': cause,
+        } for changed_at, day, old_score, new_score, old_mask, new_mask, cause in rows]
+
+
+def table_to_frame(rows, index=None):
+    """Turn table rows into the DataFrame score_dates() returns."""
+    if index is None:
+        index = pd.DatetimeIndex(pd.to_datetime(rows['day'], unit='D'), name='date')
+    score = rows['score'].astype(np.int64)
+    columns = {key: (rows['mask'] & bit) != 0 for key, bit in BITS.items()}
+    columns['score'] = score
+    columns['conviction'] = np.select([score >= 7, score >= 4], ['HIGH', 'MEDIUM'], 'LOW')
+    return pd.DataFrame(columns, index=index)
+
+
+class ScoreTable:
+    """Read-only, memory-mapped view of the score table file."""
+    
+    def __init__(self, path=None):
+        self.path = path or data_path(TABLE_FILE)
+        self._lock = threading.Lock()
+        self._table = None
+        self._stat = None
+    
+    def load(self):
+        """Current table (None if there is none yet), remapped if the file was replaced."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._table, self._stat = None, None
+            return None
+        stat = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if stat != self._stat:
+            with self._lock:
+                if stat != self._stat:
+                    table = np.load(self.path, mmap_mode='r')
+                    if table.dtype != DTYPE:
+                        raise ValueError(f"{self.path} is not a score table")
+                    self._table, self._stat = table, stat
+        return self._table
+    
+    def stamp(self):
+        """Identity of the mapped file; changes whenever the writer swaps in a new one."""
+        self.load()
+        return self._stat
+    
+    def lookup(self, days):
+        """Rows for the given day numbers, or None unless the table covers them all."""
+        table = self.load()
+        if table is None or not len(table) or not len(days):
+            return None
+        idx = np.asarray(days, dtype=np.int64) - int(table['day'][0])
+        if idx.min() < 0 or idx.max() >= len(table):
+            return None
+        return table[idx]
+
+
+class ScoreTableWriter:
+    """
+    Rebuilds the table file. Only the process holding the lock writes.
+    
+    The lock is held for the life of the process, so exactly one app
+    worker (usually the first to start) keeps the table current.
+    """
+    
+    def __init__(self, path=None, lock_path=None, years=DEFAULT_YEARS):
+        self.path = path or data_path(TABLE_FILE)
+        self.lock_path = lock_path or data_path(LOCK_FILE)
+        self.years = years
+        self._lock_file = None
+        self._written = None
+        # VIX history and earnings calendar the table was last built from
+        self._inputs = None
+        self._mutex = threading.Lock()
+        self.changes = ChangeLog()
+    
+    def acquire(self):
+        """Try to become the writer. Returns True if this process is it."""
+        if self._lock_file is not None:
+            return True
+        lock_file = open(self.lock_path, 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+        self._lock_file = lock_file
+        return True
+    
+    def release(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+    
+    @property
+    def is_writer(self):
+        return self._lock_file is not None
+    
+    def write(self, table):
+        """Write the table next to the old one, then rename it into place."""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, table)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+    
+    def rebuild_if_changed(self, tickers=DEFAULT_TICKERS):
+        """
+        Bring the table up to date with the VIX and earnings data.
+        
+        After the first full build, only days whose inputs changed are
+        rescored: see vix_affected_days and earnings_affected_days. Rows
+        whose score or catalysts flip go to the change log. A new covered
+        range (e.g. on Jan 1) or a missing file means a full rebuild.
+        
+        Returns:
+            True if it wrote a new table
+        """
+        if not self.is_writer:
+            return False
+        with self._mutex:
+            vix_store, earnings_store = get_vix_store(), get_earnings_store()
+            vix_store.refresh_if_due()
+            calendar = earnings_store.get_many(tickers)
+            start, end = table_range(years=self.years)
+            source = (vix_store.version, earnings_store.version, start, tuple(tickers),
+                      get_calendars().version)
+            if source == self._written and os.path.exists(self.path):
+                return False
+            
+            vix_data = get_vix_history()
+            inputs = (vix_data, calendar)
+            current = get_score_table().load()
+            if (self._inputs is None or self._written[2:] != source[2:] or current is None or
+                    len(current) != (end - start).days + 1):
+                with STAGE_SECONDS.time('table.rebuild'):
+                    table = build_table(start, end, vix_data)
+                    if (current is not None and len(current) == len(table) and
+                            current['day'][0] == table['day'][0]):
+                        self.changes.append(current, table, {'rebuild': table['day']})
+                    self.write(table)
+                TABLE_ROWS.inc('rebuild', amount=len(table))
+            else:
+                self._patch(current, inputs)
+            self._inputs, self._written = inputs, source
+            return True
+    
+    def _patch(self, current, inputs):
+        """Rescore only the days the changed inputs reach."""
+        old_vix, old_calendar = self._inputs
+        new_vix, new_calendar = inputs
+        first_day, last_day = int(current['day'][0]), int(current['day'][-1])
+        
+        causes = {}
+        vix_days = vix_affected_days(old_vix, new_vix, first_day, last_day)
+        if len(vix_days):
+            causes['vix'] = vix_days
+        for ticker, days in earnings_affected_days(old_calendar, new_calendar, WINDOW_DAYS,
+                                                   first_day, last_day).items():
+            causes[f'earnings:{ticker}'] = days
+        if not causes:
+            return
+        
+        with STAGE_SECONDS.time('table.patch'):
+            days = np.unique(np.concatenate(list(causes.values())))
+            rows = build_rows(days, new_vix)
+            idx = days - first_day
+            table = np.array(current)
+            self.changes.append(table[idx], rows, causes)
+            table[idx] = rows
+            self.write(table)
+        TABLE_ROWS.inc('patch', amount=len(days))
+
+
+_table = None
+_writer = None
+_enabled = False
+_singleton_lock = threading.Lock()
+
+
+def get_score_table():
+    """Process-wide reader."""
+    global _table
+    with _singleton_lock:
+        if _table is None:
+            _table = ScoreTable()
+        return _table
+
+
+def get_writer():
+    """Process-wide writer (call acquire() to actually take the lock)."""
+    global _writer
+    with _singleton_lock:
+        if _writer is None:
+            _writer = ScoreTableWriter()
+        return _writer
+
+
+def enable():
+    """Serve default-ticker scores from the table from now on (the app does this)."""
+    global _enabled
+    _enabled = True
+
+
+def enabled():
+    return _enabled
+
+
+def lookup_scores(days):
+    """Table rows for these days if the table is enabled and covers them, else None."""
+    if not _enabled:
+        return None
+    return get_score_table().lookup(days)
+
+
+if __name__ == '__main__':
+    writer = get_writer()
+    if not writer.acquire():
+        print(f"Another process is writing {writer.path}")
+    else:
+        writer.rebuild_if_changed()
+        table = get_score_table().load()
+        print(f"Wrote {len(table)} days ({from_day(table['day'][0])} to "
+              f"{from_day(table['day'][-1])}) to {writer.path}")
+        for change in writer.changes.recent(10):
+            print(f"  {change['date']}: {change['old_score']} -> {change['new_score']} "
+                  f"({', '.join(change['flipped'])}; {change['cause']})")
@@ -0,0 +1,184 @@
+import hashlib
+import threading
+import time
+from datetime import datetime
+
+from below18 import get_vix_store
+from calendars import get_calendars
+from earnings import get_earnings_store, DEFAULT_TICKERS
+from metrics import CACHE_REQUESTS, STAGE_SECONDS
+import score_table
+
+
+def data_version(tickers=DEFAULT_TICKERS):
+    """
+    Version of every input the scores depend on.
+    
+    Gives the stores a chance to refresh first: the VIX store checks the
+    vendor at most every few minutes, and stale earnings are refreshed in
+    the background.
+    """
+    vix_store = get_vix_store()
+    try:
+        vix_store.refresh_if_due()
+    except Exception:
+        # Nothing stored and the vendor is down: data_status() reports it
+        pass
+    earnings_store = get_earnings_store()
+    earnings_store.get_many(tickers)
+    version = (vix_store.version, earnings_store.version, get_calendars().version)
+    # Falling back to old data changes what pages say, not just the scores
+    status = data_status(tickers)
+    version += (status['vix']['stale'], tuple(status['earnings']['tickers']))
+    if score_table.enabled():
+        # Scores may come from a table another process rewrote
+        version += (score_table.get_score_table().stamp(),)
+    return version
+
+
+def data_status(tickers=DEFAULT_TICKERS):
+    """
+    Whether the VIX history and earnings calendars are current or the
+    last good copy kept while the vendor is failing.
+    
+    Returns:
+        {'vix': VixStore.status(), 'earnings': EarningsStore.status(tickers),
+         'stale': True if either is stale}
+    """
+    vix = get_vix_store().status()
+    earnings = get_earnings_store().status(tickers)
+    return {'vix': vix, 'earnings': earnings, 'stale': vix['stale'] or earnings['stale']}
+
+
+def describe_data_status(status):
+    """Warnings to show when pages are built from old or missing data."""
+    warnings = []
+    vix = status['vix']
+    if vix['stale'] and vix['as_of']:
+        warnings.append(f"Yahoo Finance is not responding - VIX is the last close we have ({vix['as_of']})")
+    elif vix['stale']:
+        warnings.append("Yahoo Finance is not responding - no VIX data available")
+    earnings = status['earnings']
+    if earnings['missing']:
+        warnings.append(f"No earnings dates for {', '.join(earnings['missing'][:5])} - "
+                        f"earnings catalysts may be missing")
+    elif earnings['stale']:
+        warnings.append(f"Earnings dates for {', '.join(earnings['tickers'][:5])} could not be "
+                        f"refreshed and may be out of date")
+    return warnings
+
+
+def current_key():
+    """Snapshot key: (trading date, data version)."""
+    return (datetime.now().strftime('%Y-%m-%d'), data_version())
+
+
+class SnapshotCache:
+    """
+    Process-wide cache of one computed payload.
+    
+    The payload is rebuilt only when the key changes (a new trading date
+    or new data). Concurrent callers during a rebuild wait for it instead
+    of starting their own.
+    
+    With background=True a separate refresher calls rebuild(), and get()
+    always returns the latest finished payload without checking the key,
+    so a page render never waits on a refresh. It only blocks if there is
+    no payload yet.
+    
+    Every new payload bumps `generation` and wakes wait()ers, so push
+    channels can sleep until there is something new to send.
+    """
+    
+    def __init__(self, builder, key_func=current_key, name='snapshot'):
+        """
+        Args:
+            builder: Callable () -> payload
+            key_func: Callable () -> hashable key; a new key triggers a rebuild
+            name: Label for this cache in /metrics
+        """
+        self.name = name
+        self.builder = builder
+        self.key_func = key_func
+        self._lock = threading.Lock()
+        self._key = None
+        self._payload = None
+        self.builds = 0
+        self.built_at = None
+        self.background = False
+        self.generation = 0
+        self._published = threading.Condition()
+    
+    def get(self):
+        """Current payload, rebuilding it if the key changed."""
+        payload = self._payload
+        if payload is not None and self.background:
+            CACHE_REQUESTS.inc(self.name, 'hit')
+            return payload
+        
+        key = self.key_func()
+        if key == self._key:
+            CACHE_REQUESTS.inc(self.name, 'hit')
+            return self._payload
+        
+        CACHE_REQUESTS.inc(self.name, 'miss')
+        with self._lock:
+            # Someone else may have rebuilt it while we waited
+            if key != self._key:
+                self._publish(self._build(), key)
+            return self._payload
+    
+    def _build(self):
+        with STAGE_SECONDS.time(f'{self.name}.build'):
+            payload = self.builder()
+        self.builds += 1
+        self.built_at = time.time()
+        return payload
+    
+    def rebuild(self):
+        """
+        Recompute the payload if the key changed. Returns True if it did.
+        Readers in background mode keep the old payload until this finishes.
+        """
+        key = self.key_func()
+        if key == self._key:
+            return False
+        with self._lock:
+            self._publish(self._build(), key)
+        return True
+    
+    def _publish(self, payload, key):
+        with self._published:
+            self._payload, self._key = payload, key
+            self.generation += 1
+            self._published.notify_all()
+    
+    def current(self):
+        """(generation, payload) of the latest payload, read together."""
+        with self._published:
+            return self.generation, self._payload
+    
+    def wait(self, generation, timeout=None):
+        """
+        Block until a payload newer than `generation` is published or
+        timeout passes. Returns the latest generation.
+        """
+        with self._published:
+            self._published.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+    
+    def etag(self):
+        """
+        Validator for the payload get() would return, worked out without
+        building it: it only changes when the key does.
+        """
+        if self.background and self._payload is not None:
+            key = self._key
+        else:
+            key = self.key_func()
+        return hashlib.sha1(repr((self.name, key)).encode()).hexdigest()
+    
+    def invalidate(self):
+        """Force a rebuild on the next get()."""
+        with self._lock:
+            self._key = None
@@ -0,0 +1,28 @@
+import os
+import sqlite3
+
+# Local data lives next to the code unless VOLATILITY_DATA_DIR says otherwise
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def get_data_dir():
+    """Directory for local caches (created on first use)."""
+    data_dir = os.environ.get('VOLATILITY_DATA_DIR', DEFAULT_DATA_DIR)
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir
+
+
+def data_path(name):
+    """Full path of a file inside the data directory."""
+    return os.path.join(get_data_dir(), name)
+
+
+def connect(path):
+    """
+    Open a SQLite connection that is safe to share between processes.
+    
+    WAL mode lets readers keep going while another process writes.
+    """
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    return conn
@@ -0,0 +1,19 @@
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'fixtures')
+
+sys.path.insert(0, REPO_ROOT)
+
+
+def offline_env(data_dir):
+    """Environment for a child process that replays the benchmark fixtures."""
+    env = dict(os.environ)
+    env.update({
+        'VOLATILITY_DATA_DIR': str(data_dir),
+        'MARKET_DATA_MODE': 'replay',
+        'MARKET_DATA_FIXTURES': FIXTURE_DIR,
+        'PYTHONPATH': REPO_ROOT,
+    })
+    return env
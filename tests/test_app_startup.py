@@ -0,0 +1,54 @@
+"""Worker startup the way a WSGI server does it: import app, then call the factory."""
+import json
+import subprocess
+import sys
+
+from conftest import REPO_ROOT, offline_env
+
+WORKER = """
+import json, sys
+import app
+import score_table
+wsgi = app.create_app()
+app.create_app()  # a second call must not start anything twice
+print(json.dumps({
+    'is_app': wsgi is app.app,
+    'enabled': score_table.enabled(),
+    'writer': score_table.get_writer().is_writer,
+    'background': app.dashboard_cache.background,
+    'scheduler': app.scheduler.running,
+}))
+sys.stdout.flush()
+if len(sys.argv) > 1:
+    sys.stdin.read()  # hold the writer lock until the parent is done
+"""
+
+
+def start_worker(data_dir, hold=False):
+    args = [sys.executable, '-c', WORKER] + (['hold'] if hold else [])
+    return subprocess.Popen(args, cwd=REPO_ROOT, env=offline_env(data_dir), text=True,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+
+def read_state(worker):
+    return json.loads(worker.stdout.readline())
+
+
+def test_create_app_enables_table_and_elects_writer(tmp_path):
+    worker = start_worker(tmp_path)
+    state = read_state(worker)
+    worker.communicate(timeout=60)
+    assert state == {'is_app': True, 'enabled': True, 'writer': True,
+                     'background': True, 'scheduler': True}
+
+
+def test_only_first_worker_becomes_writer(tmp_path):
+    first = start_worker(tmp_path, hold=True)
+    try:
+        assert read_state(first)['writer']
+        second = start_worker(tmp_path)
+        state = read_state(second)
+        second.communicate(timeout=60)
+        assert state['enabled'] and not state['writer']
+    finally:
+        first.communicate('', timeout=60)
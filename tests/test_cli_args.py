@@ -0,0 +1,44 @@
+"""daily_volatility_score argument checks: bad dates are usage errors (exit 2), not tracebacks."""
+import pytest
+
+from daily_volatility_score import parse_args
+
+
+def usage_error(capsys, argv):
+    with pytest.raises(SystemExit) as exit_info:
+        parse_args(argv)
+    assert exit_info.value.code == 2
+    err = capsys.readouterr().err
+    assert 'Traceback' not in err
+    return err.strip().splitlines()[-1]
+
+
+@pytest.mark.parametrize('argv, message', [
+    (['--start', '2024-13-45'], "argument --start: invalid date '2024-13-45'"),
+    (['--start', '2024-01-01', '--end', 'soon'], "argument --end: invalid date 'soon'"),
+    (['yesterday-ish'], "argument date: invalid date 'yesterday-ish'"),
+    (['--start', '2024-03-01', '--end', '2024-02-01'], "--end 2024-02-01 is before --start 2024-03-01"),
+    (['--end', '2024-02-01'], "--end needs --start"),
+])
+def test_bad_dates_are_usage_errors(capsys, argv, message):
+    assert message in usage_error(capsys, argv)
+
+
+def test_bad_dates_file_line(capsys, tmp_path):
+    path = tmp_path / 'dates.txt'
+    path.write_text("2024-01-02\n# comment\n\n2024-01-05,extra\nnot a date\n")
+    assert f"{path}, line 5: invalid date 'not a date'" in usage_error(capsys, ['--dates-file', str(path)])
+
+
+def test_missing_dates_file(capsys, tmp_path):
+    assert 'No such file' in usage_error(capsys, ['--dates-file', str(tmp_path / 'missing.txt')])
+
+
+def test_valid_dates_are_normalized(tmp_path):
+    path = tmp_path / 'dates.txt'
+    path.write_text("2024-01-02\n# comment\n\n2024/01/05,extra\n")
+    args = parse_args(['--start', '2024-1-3', '--end', '2024-01-10', '--dates-file', str(path)])
+    assert (args.start, args.end) == ('2024-01-03', '2024-01-10')
+    assert args.file_dates == ['2024-01-02', '2024-01-05']
+    assert args.batch
+    assert parse_args(['2024-07-31']).date == '2024-07-31'
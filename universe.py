@@ -0,0 +1,103 @@
+"""
+Ticker universes for the earnings catalyst.
+
+A universe is a built-in name ('megacap', 'sp100') or the path of a
+watchlist file: one ticker per line, '#' comments, and an optional
+second column (space or comma separated) with the market cap used for
+weighting. EARNINGS_UNIVERSE picks the one the app and CLI score with.
+
+The built-in universes ship without market caps, so they weight every
+ticker equally. Cap weighting needs a watchlist file with the second
+column filled in (copy universes/sp100.txt and add current caps).
+"""
+import os
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+UNIVERSE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'universes')
+
+MEGA_CAP_TICKERS = ['AAPL', 'MSFT', 'GOOGL', 'META', 'AMZN', 'NVDA']
+
+# tickers: list of symbols; weights: {ticker: market cap} or None (equal weights)
+Universe = namedtuple('Universe', ['name', 'tickers', 'weights'])
+
+
+def read_watchlist(path):
+    """Parse a watchlist file into a Universe named after the file."""
+    tickers = []
+    weights = {}
+    with open(path) as f:
+        for line in f:
+            fields = line.split('#', 1)[0].replace(',', ' ').split()
+            if not fields:
+                continue
+            ticker = fields[0].upper()
+            if ticker in tickers:
+                continue
+            tickers.append(ticker)
+            if len(fields) > 1:
+                weights[ticker] = float(fields[1])
+    
+    if weights and len(weights) != len(tickers):
+        missing = [t for t in tickers if t not in weights]
+        raise ValueError(f"{path}: market cap missing for {', '.join(missing[:5])}")
+    name = os.path.splitext(os.path.basename(path))[0]
+    return Universe(name, tickers, weights or None)
+
+
+def load_universe(spec=None):
+    """
+    Universe by name or watchlist path.
+    
+    Args:
+        spec: 'megacap' (default), a file name in universes/ without
+              '.txt' (e.g. 'sp100'), or a path to a watchlist file
+    """
+    if not spec or spec == 'megacap':
+        return Universe('megacap', list(MEGA_CAP_TICKERS), None)
+    bundled = os.path.join(UNIVERSE_DIR, f'{spec}.txt')
+    if os.path.exists(bundled):
+        return read_watchlist(bundled)
+    if os.path.exists(spec):
+        return read_watchlist(spec)
+    raise ValueError(f"Unknown universe {spec!r}: not a name in {UNIVERSE_DIR} or a file")
+
+
+def get_default_universe():
+    """The universe named by EARNINGS_UNIVERSE (megacap if unset)."""
+    return load_universe(os.environ.get('EARNINGS_UNIVERSE'))
+
+
+def weight_array(universe_or_tickers, weights=None):
+    """Weights normalized to sum to 1, in ticker order (equal if none are given)."""
+    if isinstance(universe_or_tickers, Universe):
+        tickers, weights = universe_or_tickers.tickers, universe_or_tickers.weights
+    else:
+        tickers = universe_or_tickers
+    if not tickers:
+        return np.zeros(0)
+    if weights:
+        values = np.array([float(weights.get(t, 0.0)) for t in tickers])
+    else:
+        values = np.ones(len(tickers))
+    total = values.sum()
+    return values / total if total > 0 else values
+
+
+# Pre-load a universe into the earnings store: python universe.py sp100 [--refresh]
+if __name__ == "__main__":
+    from earnings import ingest_earnings
+    
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    universe = load_universe(args[0] if args else None)
+    started = time.perf_counter()
+    counts = ingest_earnings(universe.tickers, refresh='--refresh' in sys.argv)
+    elapsed = time.perf_counter() - started
+    empty = [t for t, n in counts.items() if n == 0]
+    print(f"{universe.name}: {len(counts)} tickers, {sum(counts.values())} earnings dates "
+          f"in {elapsed:.1f}s")
+    if empty:
+        print(f"No dates for: {', '.join(empty)}")
@@ -0,0 +1,176 @@
+"""
+VIX features for every stored day, computed in one pass.
+
+For each daily close:
+    percentile        share of the trailing year's closes at or below it
+    zscore            distance from the trailing year's mean, in std devs
+    days_since_spike  calendar days since the last close above SPIKE_LEVEL
+    regime            'Very Low', 'Low to Moderate', 'Elevated' or 'High'
+    below_18          the close is under LOW_VIX (the scoring rule)
+
+Rolling windows are incremental: the z-score uses running sums of x and
+x², and the percentile is pandas' rolling rank, which keeps the window
+sorted in C as it slides.
+get_vix_analytics() recomputes only when the VIX store has new closes.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from below18 import get_vix_store
+from catalyst_index import to_days
+from metrics import CACHE_REQUESTS, STAGE_SECONDS
+
+# Trading days in the rolling window (about a year)
+WINDOW = 252
+# Fewer closes than this in the window gives NaN percentile/z-score
+MIN_PERIODS = 20
+
+SPIKE_LEVEL = 30
+LOW_VIX = 18
+
+# A close below each bound gets that label; the last label has no upper bound
+REGIME_BOUNDS = np.array([15.0, 20.0, 30.0])
+REGIME_LABELS = ('Very Low', 'Low to Moderate', 'Elevated', 'High')
+
+
+def rolling_percentile(values, window=WINDOW, min_periods=MIN_PERIODS):
+    """Share of each trailing window (including the day itself) at or below the value."""
+    # method='max' ranks ties at the top, so rank / count is "at or below"
+    windows = pd.Series(values, dtype=np.float64).rolling(window, min_periods=min_periods)
+    return windows.rank(pct=True, method='max').to_numpy()
+
+
+def rolling_zscore(values, window=WINDOW, min_periods=MIN_PERIODS):
+    """(value - trailing mean) / trailing sample std, from running sums."""
+    n = len(values)
+    if not n:
+        return np.zeros(0)
+    # Centering keeps the running sum of squares well conditioned
+    x = values - values.mean()
+    sums = np.concatenate(([0.0], np.cumsum(x)))
+    squares = np.concatenate(([0.0], np.cumsum(x * x)))
+    end = np.arange(1, n + 1)
+    start = np.maximum(0, end - window)
+    count = end - start
+    mean = (sums[end] - sums[start]) / count
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = ((squares[end] - squares[start]) - count * mean * mean) / (count - 1)
+        std = np.sqrt(np.maximum(variance, 0.0))
+        zscore = (x - mean) / std
+    zscore[(count < min_periods) | ~(std > 1e-12)] = np.nan
+    return zscore
+
+
+def days_since(days, hit):
+    """Calendar days from the last day where hit is True (0 on it, NaN before any)."""
+    last = np.where(hit, days, np.iinfo(np.int64).min)
+    last = np.maximum.accumulate(last) if len(last) else last
+    result = (days - last).astype(np.float64)
+    result[last == np.iinfo(np.int64).min] = np.nan
+    return result
+
+
+def describe_context(features):
+    """'percentile 82, z-score +1.3; last close above 30 45 days ago' for a row() dict."""
+    parts = []
+    if features['percentile'] is not None:
+        parts.append(f"percentile {features['percentile'] * 100:.0f}")
+    if features['zscore'] is not None:
+        parts.append(f"z-score {features['zscore']:+.1f}")
+    if features['days_since_spike'] is None:
+        spike = f"no close above {SPIKE_LEVEL} on record"
+    else:
+        spike = f"last close above {SPIKE_LEVEL} {features['days_since_spike']} days ago"
+    return '; '.join(filter(None, [', '.join(parts), spike]))
+
+
+class VixAnalytics:
+    """Feature columns aligned with the stored closes (day numbers, oldest first)."""
+    
+    def __init__(self, days, closes, window=WINDOW):
+        self.days = np.asarray(days, dtype=np.int64)
+        self.close = np.asarray(closes, dtype=np.float64)
+        self.percentile = rolling_percentile(self.close, window)
+        self.zscore = rolling_zscore(self.close, window)
+        self.days_since_spike = days_since(self.days, self.close > SPIKE_LEVEL)
+        self.regime = np.searchsorted(REGIME_BOUNDS, self.close, side='right').astype(np.uint8)
+        self.below_18 = self.close < LOW_VIX
+    
+    def positions(self, target_days):
+        """Row of the last close on or before each day (-1 before the first)."""
+        return np.searchsorted(self.days, target_days, side='right') - 1
+    
+    def below_18_asof(self, target_days):
+        """Vectorized is_vix_below_18 for day numbers."""
+        idx = self.positions(target_days)
+        below = np.zeros(len(idx), dtype=bool)
+        known = idx >= 0
+        below[known] = self.below_18[idx[known]]
+        return below
+    
+    def latest(self):
+        """Features of the most recent close as a dict, or None if there are none."""
+        if not len(self.days):
+            return None
+        return self.row(len(self.days) - 1)
+    
+    def row(self, i):
+        def number(value):
+            return None if np.isnan(value) else float(value)
+        
+        return {
+            'date': str(np.datetime64(int(self.days[i]), 'D')),
+            'close': float(self.close[i]),
+            'percentile': number(self.percentile[i]),
+            'zscore': number(self.zscore[i]),
+            'days_since_spike': None if np.isnan(self.days_since_spike[i]) else int(self.days_since_spike[i]),
+            'regime': REGIME_LABELS[self.regime[i]],
+            'below_18': bool(self.below_18[i])
+        }
+    
+    def frame(self):
+        """All columns as a DataFrame indexed by date."""
+        index = pd.DatetimeIndex(self.days.astype('datetime64[D]').astype('datetime64[ns]'), name='date')
+        return pd.DataFrame({
+            'close': self.close,
+            'percentile': self.percentile,
+            'zscore': self.zscore,
+            'days_since_spike': self.days_since_spike,
+            'regime': pd.Categorical.from_codes(self.regime, REGIME_LABELS),
+            'below_18': self.below_18
+        }, index=index)
+
+
+_analytics = None
+_lock = threading.Lock()
+
+
+def get_vix_analytics():
+    """Shared VixAnalytics for the stored history, recomputed when it changes."""
+    global _analytics
+    store = get_vix_store()
+    store.refresh_if_due()
+    # Read the version before the closes: new ones landing mid-build force a rebuild
+    version = store.version
+    series = store.get_series()
+    cached = _analytics
+    if cached is not None and cached[0] == version == store.version:
+        CACHE_REQUESTS.inc('vix_analytics', 'hit')
+        return cached[1]
+    
+    CACHE_REQUESTS.inc('vix_analytics', 'miss')
+    with _lock, STAGE_SECONDS.time('vix.analytics'):
+        analytics = VixAnalytics(to_days(series.index), series.to_numpy(dtype=np.float64))
+        _analytics = (version, analytics)
+        return analytics
+
+
+# Latest features and the regime history: python vix_analytics.py
+if __name__ == "__main__":
+    analytics = get_vix_analytics()
+    frame = analytics.frame()
+    print(frame.tail(10).to_string())
+    print(f"\n{len(frame)} closes from {frame.index[0]:%Y-%m-%d}")
+    print(frame['regime'].value_counts().to_string())
@@ -0,0 +1,199 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from metrics import CACHE_REQUESTS
+from storage import connect, data_path
+
+# How often to ask the vendor for new bars (the last bar moves intraday)
+DEFAULT_REFRESH_INTERVAL = float(os.environ.get('VIX_REFRESH_INTERVAL', 15 * 60))
+
+# Years of closes kept before the current year: the score table's first
+# year (SCORE_TABLE_YEARS) needs a VIX bar on or before every day it scores
+HISTORY_YEARS = int(os.environ.get('SCORE_TABLE_YEARS', 3))
+
+
+def history_start(now=None, years=HISTORY_YEARS):
+    """
+    First day the store should have closes from: Jan 1 `years` back, less
+    a week and a half so the last sessions before the holidays are in too.
+    """
+    now = now or pd.Timestamp.now()
+    return pd.Timestamp(now.year - years, 1, 1) - pd.Timedelta(days=10)
+
+
+class VixStore:
+    """
+    Daily VIX closes persisted in SQLite, one row per trading day.
+    
+    In memory the history is just two arrays: day numbers (int32, days
+    since 1970-01-01) and closes (float64). An update only downloads bars
+    from the last stored day onward, and the last day is overwritten
+    because its close keeps moving until the market shuts. The first
+    update (and the first one after the required history moves back, e.g.
+    a larger SCORE_TABLE_YEARS) downloads everything from history_start().
+    """
+    
+    def __init__(self, downloader, path=None, refresh_interval=DEFAULT_REFRESH_INTERVAL,
+                 years=HISTORY_YEARS):
+        """
+        Args:
+            downloader: Callable (start=None, period=None) -> Series of closes
+                        indexed by date. Should raise on failure.
+            path: SQLite file (default: data/vix.sqlite)
+            refresh_interval: Seconds between vendor checks
+            years: History to keep before the current year (see history_start)
+        """
+        self.downloader = downloader
+        self.path = path or data_path('vix.sqlite')
+        self.refresh_interval = refresh_interval
+        self.years = years
+        self._lock = threading.RLock()
+        self._days = None
+        self._closes = None
+        self._series = None
+        self._checked_at = 0.0
+        # Earliest start already downloaded (day number): the vendor may
+        # simply have nothing older, so don't ask for the same gap again
+        self._history_from = None
+        # Bumped whenever the stored closes change, so caches know to rebuild
+        self.version = 0
+        # Set while the vendor is failing and we serve the stored history
+        self.last_error = None
+    
+    def _connect(self):
+        conn = connect(self.path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS vix_closes (
+                day INTEGER PRIMARY KEY,
+                close REAL NOT NULL
+            )""")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS vix_meta (
+                key TEXT PRIMARY KEY,
+                value REAL NOT NULL
+            )""")
+        return conn
+    
+    def _read(self, conn):
+        rows = conn.execute("SELECT day, close FROM vix_closes ORDER BY day").fetchall()
+        days = np.array([r[0] for r in rows], dtype=np.int32)
+        closes = np.array([r[1] for r in rows], dtype=np.float64)
+        meta = dict(conn.execute("SELECT key, value FROM vix_meta").fetchall())
+        return days, closes, meta.get('checked_at', 0.0), meta.get('history_from')
+    
+    def _set(self, days, closes, checked_at, history_from):
+        if (self._days is None or not np.array_equal(days, self._days) or
+                not np.array_equal(closes, self._closes)):
+            self.version += 1
+            self._series = None
+        self._days, self._closes, self._checked_at = days, closes, checked_at
+        self._history_from = history_from
+    
+    def _load(self):
+        conn = self._connect()
+        try:
+            self._set(*self._read(conn))
+        finally:
+            conn.close()
+    
+    def update(self):
+        """
+        Download bars missing since the last stored day, or the whole
+        history from history_start() if it isn't stored yet. Returns rows
+        written.
+        """
+        with self._lock:
+            if self._days is None:
+                self._load()
+            
+            start = history_start(years=self.years)
+            start_day = (start - pd.Timestamp('1970-01-01')).days
+            backfill = self._history_from is None or self._history_from > start_day
+            if len(self._days) and not backfill:
+                start = pd.Timestamp(int(self._days[-1]), unit='D')
+            closes = self.downloader(start=start.strftime('%Y-%m-%d'))
+            
+            closes = closes.dropna()
+            days = pd.DatetimeIndex(closes.index).tz_localize(None).normalize()
+            rows = [(int(d), float(c)) for d, c in
+                    zip(days.values.astype('datetime64[D]').astype(np.int64), closes.to_numpy())]
+            
+            checked_at = time.time()
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO vix_closes VALUES (?, ?)", rows)
+                    conn.execute("INSERT OR REPLACE INTO vix_meta VALUES ('checked_at', ?)",
+                                 (checked_at,))
+                    if backfill:
+                        conn.execute("INSERT OR REPLACE INTO vix_meta VALUES ('history_from', ?)",
+                                     (start_day,))
+                self._set(*self._read(conn))
+            finally:
+                conn.close()
+            self.last_error = None
+            return len(rows)
+    
+    def refresh_if_due(self):
+        """Run update() if refresh_interval has passed since the last check."""
+        with self._lock:
+            if self._days is None:
+                self._load()
+            if time.time() - self._checked_at < self.refresh_interval:
+                CACHE_REQUESTS.inc('vix', 'hit')
+                return
+            # Another process may have updated the file
+            self._load()
+            if time.time() - self._checked_at < self.refresh_interval:
+                CACHE_REQUESTS.inc('vix', 'hit')
+                return
+            CACHE_REQUESTS.inc('vix', 'stale' if len(self._days) else 'miss')
+            try:
+                self.update()
+            except Exception as e:
+                if not len(self._days):
+                    self.last_error = f"{type(e).__name__}: {e}"
+                    raise
+                self.mark_failed(e)
+    
+    def mark_failed(self, error):
+        """
+        Record a failed update: keep serving the stored history, marked
+        stale, and don't ask the vendor again until the next interval.
+        """
+        with self._lock:
+            self.last_error = f"{type(error).__name__}: {error}"
+            self._checked_at = time.time()
+    
+    def get_series(self):
+        """Close prices as a Series indexed by date (oldest first)."""
+        self.refresh_if_due()
+        with self._lock:
+            if self._series is None:
+                index = pd.DatetimeIndex(self._days.astype('datetime64[D]').astype('datetime64[ns]'),
+                                         name='Date')
+                self._series = pd.Series(self._closes, index=index, name='Close')
+            return self._series
+    
+    def latest(self):
+        """(date, close) of the most recent bar."""
+        series = self.get_series()
+        return series.index[-1], float(series.iloc[-1])
+    
+    def status(self):
+        """
+        Freshness of the stored history, without contacting the vendor.
+        
+        Returns:
+            Dict with 'as_of' (last bar 'YYYY-MM-DD' or None), 'stale'
+            (True while the last vendor check failed) and 'error'
+        """
+        with self._lock:
+            days = self._days
+            as_of = (pd.Timestamp(int(days[-1]), unit='D').strftime('%Y-%m-%d')
+                     if days is not None and len(days) else None)
+            return {'as_of': as_of, 'stale': self.last_error is not None, 'error': self.last_error}